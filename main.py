@@ -1,30 +1,243 @@
 from src.config.config import load_config, validate_config
-from src.config.logging_config import setup_logging
+from src.config.logging_config import setup_logging, new_request_id, stage_timer
 from src.config.prompts import (
     INTRO_MESSAGE, NAME_REQUEST, GREETING_RESPONSE,
-    ERROR_MISSING_ENV, MAX_HISTORY_LENGTH
+    ERROR_MISSING_ENV, MAX_HISTORY_LENGTH, LATE_REFLECTION_MESSAGE
 )
-from src.api.openai_client import initialize_openai, generate_reflection
+from src.api.openai_client import initialize_openai, generate_reflection, get_router
+from src.api.model_router import load_routing_policy, schedule_stats_logging
+from src.api.reflection_budget import BudgetedReflector
 from src.api.youtube_client import initialize_youtube, detect_video_request, extract_tool_request
-from src.utils.mood_analyzer import infer_mood
-from src.utils.text_processing import format_tool_response
+from src.utils.mood_analyzer import infer_mood, MOOD_CLASSIFIER_VERSION
+from src.utils.text_processing import format_tool_responses
+from src.utils.profiler import ChatProfiler
+from src.utils.message_parser import parse_message
 from src.data.journal_db import JournalDatabase
+from src.data.archive import schedule_archiving
+from src.data.backup import BackupService
+from src.data.shared_cache import SharedCache
+from src.serving.workers import serve_workers
 from src.ui.gradio_interface import JournalUI
+import asyncio
 import sys
 import logging
+import threading
+import time
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+def build_interface(config, run_background_jobs=True):
+    """Initialize the app components and build the Gradio interface.
+    
+    Args:
+        config: Application configuration from load_config
+        run_background_jobs: Whether this process runs periodic jobs such as archiving
+    """
+    # Initialize components
+    routing_policy = load_routing_policy(config["model_routing_policy"])
+    shared_cache = SharedCache(config["shared_cache_path"])
+    initialize_openai(
+        config["openai_api_key"], routing_policy,
+        cache=shared_cache if config["reflection_cache_ttl"] > 0 else None,
+        cache_ttl=config["reflection_cache_ttl"],
+        client_options={
+            "base_url": config["openai_base_url"],
+            "timeout": config["openai_timeout"],
+            "max_connections": config["openai_max_connections"],
+            "max_keepalive_connections": config["openai_max_keepalive"],
+            "keepalive_expiry": config["openai_keepalive_expiry"],
+            "http2": config["openai_http2"]
+        }
+    )
+    youtube_tool = initialize_youtube(
+        config["youtube_api_key"],
+        cache=shared_cache,
+        cache_ttl=config["youtube_cache_ttl"],
+        daily_quota=config["youtube_daily_quota"]
+    )
+    journal_db = JournalDatabase(config["db_path"], config["archive_dir"])
+    
+    # Background jobs run in a single process, even with several workers
+    if run_background_jobs and config["archive_after_days"] > 0:
+        schedule_archiving(journal_db, config["archive_after_days"], config["archive_interval_hours"] * 3600)
+    if run_background_jobs and config["backup_interval_hours"] > 0:
+        BackupService(
+            config["db_path"], config["backup_dir"],
+            interval_seconds=config["backup_interval_hours"] * 3600,
+            retention=config["backup_retention"],
+            archive_dir=config["archive_dir"]
+        ).start()
+    # Route stats are per process, so every worker reports its own
+    if config["route_stats_interval_minutes"] > 0:
+        schedule_stats_logging(get_router, config["route_stats_interval_minutes"] * 60)
+    # One model call per concurrent turn, so no turn queues before its call starts
+    reflector = BudgetedReflector(
+        generate_reflection, budget=config["reflection_budget"], max_workers=config["chat_concurrency"]
+    )
+    
+    profiler = ChatProfiler(
+        sample_rate=config["profile_sample_rate"],
+        dump_every=config["profile_dump_every"]
+    )
+    
+    # Late model replies waiting to be appended, keyed by turn ID. Chat threads
+    # add to it while the event loop pops from it, so it is guarded by a lock.
+    late_replies = {}
+    late_replies_lock = threading.Lock()
+    
+    def handle_turn(message: str, history: list):
+        """Answer one message, returning the pending model call if the
+        reflection was answered locally."""
+        # Everything below, tools and model call included, shares one deadline
+        deadline = time.monotonic() + config["reflection_budget"]
+        if len(history) == 0:
+            history.append({"role": "assistant", "content": INTRO_MESSAGE})
+            history.append({"role": "assistant", "content": NAME_REQUEST})
+        
+        # Analyze the message once and share it across the pipeline stages
+        parsed = parse_message(message)
+        with stage_timer("mood"):
+            mood = infer_mood(parsed)
+        
+        # Plan this turn's tool invocations: a video request, or a
+        # mood-based recommendation if the user might be stressed and needs help
+        invocations = []
+        wants_video = detect_video_request(parsed)
+        if wants_video:
+            invocations.append(extract_tool_request(parsed))
+        elif mood in ['stress', 'negative', 'sadness'] and parsed.asks_for_help:
+            invocations.append({"tool": "get_mood_based_recommendation", "mood": mood})
+        
+        # Start the model call first so it runs alongside the tools.
+        # Direct video requests and greetings don't need a reflection.
+        direct_video = wants_video and parsed.direct_video
+        reflection_future = None
+        if not direct_video and mood != 'greeting':
+            reflection_future = reflector.submit(message, mood)
+        
+        # Run the tools concurrently and merge their responses
+        tool_response = None
+        if invocations:
+            with stage_timer("tool"):
+                tool_results = youtube_tool.handle_tool_calls(invocations, deadline=deadline)
+            tool_response = format_tool_responses(tool_results)
+        
+        # For direct video requests, we might want to prioritize the video response
+        if direct_video:
+            agent_response = tool_response
+            history.append({"role": "user", "content": message})
+            history.append({"role": "assistant", "content": agent_response})
+            journal_db.save_entry(message, mood, MOOD_CLASSIFIER_VERSION)
+            return None
+        
+        # Handle greeting specially
+        if mood == 'greeting':
+            history.append({"role": "user", "content": message})
+            history.append({"role": "assistant", "content": GREETING_RESPONSE})
+            journal_db.save_entry(message, mood, MOOD_CLASSIFIER_VERSION)
+            return None
+        
+        # Collect the reflection, answering locally if the model misses
+        # what is left of the turn's deadline
+        with stage_timer("reflection"):
+            reflection_text, pending = reflector.reflect(message, mood, reflection_future, deadline)
+        
+        # Format response with tool output if available
+        if tool_response:
+            agent_response = f"{reflection_text}\n\n{tool_response}"
+        else:
+            agent_response = reflection_text
+        
+        # Save entry to database
+        with stage_timer("save"):
+            journal_db.save_entry(message, mood, MOOD_CLASSIFIER_VERSION)
+        
+        # Update history
+        history.append({"role": "user", "content": message})
+        history.append({"role": "assistant", "content": agent_response})
+        return pending
+    
+    # Define chat handler. It returns as soon as the budgeted answer is ready,
+    # along with the turn ID of a model reply still on its way, if any.
+    def chat(message: str, history: list):
+        turn_id = new_request_id()
+        try:
+            with profiler.profile():
+                pending = handle_turn(message, history)
+            
+            if pending is None:
+                return "", history, None
+            if not config["append_late_reflection"]:
+                # Nobody will read the reply; drop the call if it hasn't started yet
+                pending.cancel()
+                return "", history, None
+            
+            # Forget replies whose follow-up event never ran, e.g. the browser closed
+            expired = time.monotonic() - 2 * config["late_reflection_timeout"]
+            with late_replies_lock:
+                stale_ids = [key for key, (_, started) in late_replies.items() if started < expired]
+                stale = [late_replies.pop(stale_id) for stale_id in stale_ids]
+                late_replies[turn_id] = (pending, time.monotonic())
+            for stale_pending, _ in stale:
+                stale_pending.cancel()
+            return "", history, turn_id
+            
+        except Exception as e:
+            error_msg = f"⚠️ Error: {str(e)}"
+            logger.error(f"Chat error: {e}", exc_info=True)
+            history.append({"role": "user", "content": message})
+            history.append({"role": "assistant", "content": error_msg})
+            return "", history, None
+    
+    # Append the model's reply if it arrives after the budgeted answer. This is
+    # a separate async event, so waiting for it holds neither a worker thread
+    # nor one of the chat handler's concurrency slots.
+    async def append_late_reflection(history: list, turn_id):
+        if not turn_id:
+            return history
+        with late_replies_lock:
+            late = late_replies.pop(turn_id, None)
+        if late is None:
+            return history
+        try:
+            late_text = await asyncio.wait_for(asyncio.wrap_future(late[0]), timeout=config["late_reflection_timeout"])
+        except asyncio.TimeoutError:
+            late[0].cancel()
+            logger.warning(f"Late reflection for turn {turn_id} did not arrive in time, dropping it")
+            return history
+        except Exception as e:
+            logger.error(f"Late reflection for turn {turn_id} failed: {e}")
+            return history
+        history.append({"role": "assistant", "content": LATE_REFLECTION_MESSAGE.format(late_text)})
+        return history
+    
+    # Create UI
+    journal_ui = JournalUI(chat, append_late_reflection, concurrency_limit=config["chat_concurrency"])
+    return journal_ui.create_interface()
+
+def run_worker(worker_index, port):
+    """Serve the app from one worker process of the multi-process mode."""
+    config = load_config()
+    setup_logging(log_file=f"app-worker{worker_index}.log", stage_sample_rate=config["log_stage_sample_rate"])
+    logger.info(f"🌿 Starting worker {worker_index} on port {port}...")
+    
+    try:
+        demo = build_interface(config, run_background_jobs=worker_index == 0)
+        demo.launch(server_name="127.0.0.1", server_port=port, share=False)
+    except Exception as e:
+        logger.error(f"Worker {worker_index} error: {e}", exc_info=True)
+        sys.exit(1)
+
 def main():
     """Main entry point for the Inner Mirror Agent."""
-    # Setup logging
-    setup_logging()
-    logger.info("🌿 Starting Inner Mirror Agent...")
-    
     # Load configuration
     config = load_config()
     
+    # Setup logging
+    setup_logging(stage_sample_rate=config["log_stage_sample_rate"])
+    logger.info("🌿 Starting Inner Mirror Agent...")
+    
     # Validate configuration
     missing_keys = validate_config(config)
     if missing_keys:
@@ -35,91 +248,27 @@ def main():
         sys.exit(1)
     
     try:
-        # Initialize components
-        initialize_openai(config["openai_api_key"])
-        youtube_tool = initialize_youtube(config["youtube_api_key"])
-        journal_db = JournalDatabase(config["db_path"])
-        
-        # Define chat handler
-        def chat(message: str, history: list) -> tuple[str, list]:
-            try:
-                if len(history) == 0:
-                    history.append({"role": "assistant", "content": INTRO_MESSAGE})
-                    history.append({"role": "assistant", "content": NAME_REQUEST})
-                
-                # Analyze mood
-                mood = infer_mood(message)
-                
-                # Check for video requests first
-                tool_response = None
-                wants_video = detect_video_request(message)
-                
-                if wants_video:
-                    # Extract tool request and call the appropriate tool
-                    tool_request = extract_tool_request(message)
-                    tool_name = tool_request.pop("tool")
-                    
-                    # Call the tool
-                    tool_result = youtube_tool.handle_tool_call(tool_name, **tool_request)
-                    
-                    # Format the tool response
-                    tool_response = format_tool_response(tool_result, tool_name)
-                    
-                    # For direct video requests, we might want to prioritize the video response
-                    if any(phrase in message.lower() for phrase in ["video of", "video about", "video showing"]):
-                        agent_response = tool_response
-                        history.append({"role": "user", "content": message})
-                        history.append({"role": "assistant", "content": agent_response})
-                        journal_db.save_entry(message, mood)
-                        return "", history
-                
-                # Handle greeting specially
-                if mood == 'greeting':
-                    history.append({"role": "user", "content": message})
-                    history.append({"role": "assistant", "content": GREETING_RESPONSE})
-                    journal_db.save_entry(message, mood)
-                    return "", history
-                
-                # Generate reflection for non-greeting, non-direct video requests
-                reflection_text = generate_reflection(message, mood)
-                
-                # Format response with tool output if available
-                if tool_response:
-                    agent_response = f"{reflection_text}\n\n{tool_response}"
-                else:
-                    # Check if the user might be stressed and needs help
-                    if mood in ['stress', 'negative', 'sadness'] and any(word in message.lower() for word in ['help', 'bad', 'sad', 'anxious', 'worried']):
-                        # Get a mood-based video recommendation
-                        tool_result = youtube_tool.handle_tool_call("get_mood_based_recommendation", mood=mood)
-                        mood_tool_response = format_tool_response(tool_result, "get_mood_based_recommendation")
-                        agent_response = f"{reflection_text}\n\n{mood_tool_response}"
-                    else:
-                        agent_response = reflection_text
-                
-                # Save entry to database
-                journal_db.save_entry(message, mood)
-                
-                # Update history
-                history.append({"role": "user", "content": message})
-                history.append({"role": "assistant", "content": agent_response})
-                
-                return "", history
-                
-            except Exception as e:
-                error_msg = f"⚠️ Error: {str(e)}"
-                logger.error(f"Chat error: {e}", exc_info=True)
-                history.append({"role": "user", "content": message})
-                history.append({"role": "assistant", "content": error_msg})
-                return "", history
-        
-        # Create and launch UI
-        journal_ui = JournalUI(chat)
-        demo = journal_ui.create_interface()
-        demo.launch(share=True)
+        if config["web_workers"] > 1:
+            # Several app processes behind a local sticky load balancer
+            logger.info(
+                f"Serving {config['web_workers']} workers on {config['server_host']}:{config['server_port']}; "
+                f"no public share link is created in multi-worker mode"
+            )
+            serve_workers(
+                run_worker,
+                workers=config["web_workers"],
+                host=config["server_host"],
+                port=config["server_port"],
+                backend_port_start=config["worker_port_start"]
+            )
+        else:
+            # Create and launch UI
+            demo = build_interface(config)
+            demo.launch(share=True)
         
     except Exception as e:
         logger.error(f"Application error: {e}", exc_info=True)
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,166 @@
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Routes are checked in order; the first one whose limits match the entry wins.
+# "max_words" / "moods" set to None match anything. Heavy moods (stress, sadness,
+# anger, negative) are left out of the cheaper routes so they always reach the
+# strongest model. Costs are USD per 1K tokens.
+DEFAULT_ROUTING_POLICY = [
+    {
+        "name": "light",
+        "model": "gpt-4o-mini",
+        "max_tokens": 200,
+        "max_words": 40,
+        "moods": ['greeting', 'neutral', 'joy', 'positive', 'gratitude', 'curious', 'surprise'],
+        "cost_per_1k_tokens": 0.0006
+    },
+    {
+        "name": "standard",
+        "model": "gpt-4o",
+        "max_tokens": 400,
+        "max_words": 150,
+        "moods": ['greeting', 'neutral', 'joy', 'positive', 'gratitude', 'curious',
+                  'surprise', 'confusion', 'reflection'],
+        "cost_per_1k_tokens": 0.01
+    },
+    {
+        "name": "deep",
+        "model": "gpt-4",
+        "max_tokens": 700,
+        "max_words": None,
+        "moods": None,
+        "cost_per_1k_tokens": 0.06
+    }
+]
+
+
+def load_routing_policy(policy_path: Optional[Path] = None) -> List[Dict]:
+    """Load a routing policy table from a JSON file.
+
+    Args:
+        policy_path: Path to a JSON file holding a list of routes. When not
+            given, the default policy is returned.
+
+    Returns:
+        List of route dictionaries
+
+    Raises:
+        ValueError: If the file does not contain a valid policy
+    """
+    if not policy_path:
+        return DEFAULT_ROUTING_POLICY
+
+    with open(policy_path, encoding="utf-8") as f:
+        policy = json.load(f)
+
+    if not isinstance(policy, list) or not policy:
+        raise ValueError("Routing policy must be a non-empty list of routes")
+    for route in policy:
+        if "name" not in route or "model" not in route:
+            raise ValueError("Every route needs a 'name' and a 'model'")
+        max_tokens = route.get("max_tokens")
+        if isinstance(max_tokens, bool) or not isinstance(max_tokens, int) or max_tokens <= 0:
+            raise ValueError(f"Route '{route['name']}' needs a positive integer 'max_tokens'")
+
+    logger.info(f"Loaded routing policy with {len(policy)} routes from {policy_path}")
+    return policy
+
+
+class ModelRouter:
+    """Pick the model for a reflection based on entry length and mood."""
+
+    def __init__(self, policy: Optional[List[Dict]] = None):
+        """Initialize the router with the given policy table."""
+        self.policy = policy or DEFAULT_ROUTING_POLICY
+        self._lock = threading.Lock()
+        self._stats = {route["name"]: self._empty_stats() for route in self.policy}
+
+    @staticmethod
+    def _empty_stats() -> Dict:
+        """Return a fresh stats record for a route."""
+        return {"calls": 0, "errors": 0, "total_latency": 0.0, "total_tokens": 0, "total_cost": 0.0}
+
+    def select_route(self, user_entry: str, mood: str) -> Dict:
+        """Return the first route in the policy that matches the entry.
+
+        Falls back to the last route when nothing matches, so a policy
+        should end with a catch-all route.
+        """
+        word_count = len(user_entry.split())
+        for route in self.policy:
+            max_words = route.get("max_words")
+            moods = route.get("moods")
+            if max_words is not None and word_count > max_words:
+                continue
+            if moods is not None and mood not in moods:
+                continue
+            return route
+        return self.policy[-1]
+
+    def record(self, route: Dict, latency: float, total_tokens: int = 0, error: bool = False) -> None:
+        """Record the outcome of a call served by the given route."""
+        cost = total_tokens / 1000 * route.get("cost_per_1k_tokens", 0.0)
+        with self._lock:
+            stats = self._stats.setdefault(route["name"], self._empty_stats())
+            stats["calls"] += 1
+            stats["total_latency"] += latency
+            stats["total_tokens"] += total_tokens
+            stats["total_cost"] += cost
+            if error:
+                stats["errors"] += 1
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Return per-route call counts, average latency and cost."""
+        with self._lock:
+            report = {}
+            for name, stats in self._stats.items():
+                calls = stats["calls"]
+                report[name] = {
+                    **stats,
+                    "avg_latency": stats["total_latency"] / calls if calls else 0.0
+                }
+            return report
+
+    def log_stats(self) -> None:
+        """Log the per-route stats for every route that served a call."""
+        for name, stats in self.get_stats().items():
+            if not stats["calls"]:
+                continue
+            logger.info(
+                f"Route '{name}': {stats['calls']} calls, {stats['errors']} errors, "
+                f"avg latency {stats['avg_latency']:.2f}s, {stats['total_tokens']} tokens, "
+                f"${stats['total_cost']:.4f}",
+                extra={"route": name, "route_stats": stats}
+            )
+
+
+def schedule_stats_logging(get_router: Callable[[], ModelRouter], interval_seconds: float) -> threading.Thread:
+    """Periodically log the router's per-route stats.
+
+    Stats are kept per process, so with several web workers each worker
+    logs its own totals to its own log file.
+
+    Args:
+        get_router: Returns the router currently serving reflections
+        interval_seconds: Time between reports
+
+    Returns:
+        The background (daemon) thread running the schedule
+    """
+    def run() -> None:
+        while True:
+            time.sleep(interval_seconds)
+            try:
+                get_router().log_stats()
+            except Exception as e:
+                logger.error(f"Logging route stats failed: {e}", exc_info=True)
+
+    thread = threading.Thread(target=run, name="route-stats", daemon=True)
+    thread.start()
+    return thread
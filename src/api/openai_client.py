@@ -1,11 +1,173 @@
 import openai
+import httpx
+import hashlib
+import threading
+import time
+import logging
+from src.api.model_router import ModelRouter
 
-def initialize_openai(api_key):
-    """Initialize the OpenAI client with the provided API key."""
-    openai.api_key = api_key
+logger = logging.getLogger(__name__)
 
-def generate_reflection(user_entry, mood, previous_mood=None):
-    """Generate a reflective response based on the user's journal entry and mood."""
+# Router shared by every chat session; replaced by initialize_openai
+_router = ModelRouter()
+
+# Optional cache of reflections, shared across worker processes
+_cache = None
+_cache_ttl = 3600
+
+# Pooled clients shared by every chat session, so concurrent reflections
+# reuse warm connections instead of paying a TLS handshake each
+_client = None
+_async_client = None
+# Whether _client was created here; a client passed to initialize_openai
+# belongs to the caller, who is responsible for closing it
+_owns_client = False
+_api_key = None
+_client_options = {}
+_client_lock = threading.Lock()
+
+def _http2_available():
+    """Return True if the optional h2 package needed for HTTP/2 is installed."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def _http_client_kwargs(timeout, connect_timeout, max_connections, max_keepalive_connections,
+                        keepalive_expiry, http2):
+    """Build the pool, timeout and protocol settings shared by both client variants."""
+    if http2 and not _http2_available():
+        logger.warning("HTTP/2 requested but the h2 package is not installed, using HTTP/1.1")
+        http2 = False
+    return {
+        "limits": httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        ),
+        "timeout": httpx.Timeout(timeout, connect=connect_timeout),
+        "http2": http2
+    }
+
+def create_openai_client(api_key=None, base_url=None, timeout=30.0, connect_timeout=5.0,
+                         max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0,
+                         http2=False, max_retries=2):
+    """Create an OpenAI client with an explicit, tunable connection pool.
+
+    Args:
+        api_key: OpenAI API key; falls back to OPENAI_API_KEY when None
+        base_url: API endpoint, e.g. a local stand-in server for tests
+        timeout: Seconds to wait for a response
+        connect_timeout: Seconds to wait for a new connection
+        max_connections: Maximum open connections in the pool
+        max_keepalive_connections: Idle connections kept warm for reuse
+        keepalive_expiry: Seconds an idle connection is kept open
+        http2: Use HTTP/2 if the optional h2 package is installed
+        max_retries: Retries on connection errors and retryable statuses
+
+    Returns:
+        An openai.OpenAI client
+    """
+    http_kwargs = _http_client_kwargs(timeout, connect_timeout, max_connections,
+                                      max_keepalive_connections, keepalive_expiry, http2)
+    return openai.OpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        timeout=http_kwargs["timeout"],
+        max_retries=max_retries,
+        http_client=openai.DefaultHttpxClient(**http_kwargs)
+    )
+
+def create_async_openai_client(api_key=None, base_url=None, timeout=30.0, connect_timeout=5.0,
+                               max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0,
+                               http2=False, max_retries=2):
+    """Create an openai.AsyncOpenAI client; takes the same arguments as create_openai_client."""
+    http_kwargs = _http_client_kwargs(timeout, connect_timeout, max_connections,
+                                      max_keepalive_connections, keepalive_expiry, http2)
+    return openai.AsyncOpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        timeout=http_kwargs["timeout"],
+        max_retries=max_retries,
+        http_client=openai.DefaultAsyncHttpxClient(**http_kwargs)
+    )
+
+def initialize_openai(api_key, routing_policy=None, cache=None, cache_ttl=3600, client=None, client_options=None):
+    """Initialize the OpenAI client with the provided API key and routing policy.
+
+    When a SharedCache is given, reflections for identical entries are reused
+    for `cache_ttl` seconds.
+
+    Args:
+        api_key: OpenAI API key
+        routing_policy: Routes for the ModelRouter, or None for the defaults
+        cache: Optional SharedCache for reflections
+        cache_ttl: Seconds a cached reflection is reused
+        client: Client to use instead of creating one, e.g. a stub in tests
+        client_options: Keyword arguments for create_openai_client
+    """
+    global _router, _cache, _cache_ttl, _client, _owns_client, _api_key, _client_options
+    _router = ModelRouter(routing_policy)
+    _cache = cache
+    _cache_ttl = cache_ttl
+    with _client_lock:
+        _close_clients()
+        _api_key = api_key
+        _client_options = dict(client_options or {})
+        _owns_client = client is None
+        _client = client or create_openai_client(api_key, **_client_options)
+
+def _close_clients():
+    """Close the shared sync client if this module created it; callers must hold _client_lock."""
+    global _client, _async_client
+    if _client is not None and _owns_client:
+        try:
+            _client.close()
+        except Exception as e:
+            logger.warning(f"Failed to close OpenAI client: {e}")
+    # The async client's pool belongs to the event loop that used it, so it is
+    # dropped rather than closed from this thread
+    _client = None
+    _async_client = None
+
+def get_client():
+    """Return the shared OpenAI client, creating a default one if needed."""
+    global _client, _owns_client
+    with _client_lock:
+        if _client is None:
+            _client = create_openai_client(_api_key, **_client_options)
+            _owns_client = True
+        return _client
+
+def get_async_client():
+    """Return the shared AsyncOpenAI client, created on first use with the same settings."""
+    global _async_client
+    with _client_lock:
+        if _async_client is None:
+            _async_client = create_async_openai_client(_api_key, **_client_options)
+        return _async_client
+
+def get_router():
+    """Return the model router used for reflections."""
+    return _router
+
+def generate_reflection(user_entry, mood, previous_mood=None, router=None, client=None):
+    """Generate a reflective response based on the user's journal entry and mood.
+
+    The model and max_tokens are chosen by the router from the entry length
+    and mood, so short, low-stakes entries are served by a faster model.
+    Requests go through the shared pooled client unless `client` is given.
+    """
+    router = router or _router
+    client = client or get_client()
+    route = router.select_route(user_entry, mood)
+    
+    cache_key = hashlib.sha256(f"{route['model']}\n{mood}\n{user_entry}".encode("utf-8")).hexdigest()
+    if _cache is not None:
+        cached = _cache.get("reflection", cache_key)
+        if cached is not None:
+            return cached
     system_prompt = {
         "role": "system",
         "content": """
@@ -22,9 +184,23 @@ def generate_reflection(user_entry, mood, previous_mood=None):
         "content": f"Journal entry: {user_entry}\nMood: {mood}\nReflect on this entry thoughtfully and suggest a helpful insight."
     }
 
-    response = openai.chat.completions.create(
-        model="gpt-4",
-        messages=[system_prompt, user_message]
-    )
+    start = time.perf_counter()
+    try:
+        response = client.chat.completions.create(
+            model=route["model"],
+            max_tokens=route["max_tokens"],
+            messages=[system_prompt, user_message]
+        )
+    except Exception:
+        router.record(route, time.perf_counter() - start, error=True)
+        raise
+
+    latency = time.perf_counter() - start
+    usage = getattr(response, "usage", None)
+    router.record(route, latency, getattr(usage, "total_tokens", 0) or 0)
+    logger.info(f"Reflection served by route '{route['name']}' ({route['model']}) in {latency:.2f}s")
 
-    return response.choices[0].message.content.strip() 
\ No newline at end of file
+    reflection = response.choices[0].message.content.strip()
+    if _cache is not None:
+        _cache.set("reflection", cache_key, reflection, _cache_ttl)
+    return reflection 
\ No newline at end of file
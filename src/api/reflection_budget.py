@@ -0,0 +1,66 @@
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Optional, Tuple
+from src.utils.concurrency import submit_in_context
+from src.utils.fallback_reflections import generate_local_reflection
+
+logger = logging.getLogger(__name__)
+
+class BudgetedReflector:
+    """Run reflection generation under a per-turn latency budget.
+
+    Callers can start the model call with submit, do other work for the turn
+    alongside it, and then collect the reply with reflect before the turn's
+    deadline.
+    """
+
+    def __init__(self, generate_fn: Callable[[str, str], str], budget: float = 8.0, max_workers: int = 8):
+        """Initialize the reflector.
+
+        Args:
+            generate_fn: Function producing a model reflection for (entry, mood)
+            budget: Seconds to wait for the model before answering locally
+            max_workers: Maximum number of model calls in flight at once
+        """
+        self.generate_fn = generate_fn
+        self.budget = budget
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="reflection")
+
+    def submit(self, user_entry: str, mood: str) -> Future:
+        """Start generating a model reflection in the background."""
+        return submit_in_context(self._executor, self.generate_fn, user_entry, mood)
+
+    def reflect(self, user_entry: str, mood: str, future: Optional[Future] = None,
+                deadline: Optional[float] = None) -> Tuple[str, Optional[Future]]:
+        """Return a reflection within the latency budget.
+
+        Args:
+            user_entry: The user's journal entry
+            mood: Mood inferred for the entry
+            future: Model call already started with submit; started now if None
+            deadline: time.monotonic() value by which the turn must answer;
+                defaults to `budget` seconds from now
+
+        Returns:
+            Tuple of (reflection text, pending future). The future is set when
+            the deadline passed and the model call is still running, so the
+            caller can append its reply later; callers that won't should
+            cancel it. A call still queued at the deadline is cancelled here.
+        """
+        if future is None:
+            future = self.submit(user_entry, mood)
+        if deadline is None:
+            deadline = time.monotonic() + self.budget
+        try:
+            return future.result(timeout=max(0.0, deadline - time.monotonic())), None
+        except FutureTimeoutError:
+            if future.cancel():
+                # Never started: don't let a backlog of stale calls build up behind busy workers
+                logger.warning("Reflection was still queued at the turn deadline, answering locally")
+                return generate_local_reflection(user_entry, mood), None
+            logger.warning("Reflection missed the turn deadline, answering locally")
+            return generate_local_reflection(user_entry, mood), future
+        except Exception as e:
+            logger.error(f"Reflection failed, answering locally: {e}", exc_info=True)
+            return generate_local_reflection(user_entry, mood), None
@@ -1,28 +1,235 @@
 from googleapiclient.discovery import build
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import httplib2
+import logging
 import re
 import json
+import threading
+import time
+from src.utils.concurrency import submit_in_context
+from src.utils.message_parser import parse_message
+
+logger = logging.getLogger(__name__)
+
+# The videos().list endpoint accepts at most 50 IDs per request
+MAX_ENRICH_BATCH = 50
+
+# YouTube Data API quota cost of each call we make
+SEARCH_QUOTA_COST = 100
+LIST_QUOTA_COST = 1
 
 class YouTubeToolHandler:
     """A tool handler for YouTube video recommendations and searches."""
     
-    def __init__(self, api_key):
-        """Initialize the YouTube tool handler with the given API key."""
-        self.youtube_client = build('youtube', 'v3', developerKey=api_key)
-        self.tools = {
-            "search_video": self.search_video,
-            "get_trending_videos": self.get_trending_videos,
-            "get_mood_based_recommendation": self.get_mood_based_recommendation
-        }
+    def __init__(self, api_key, max_workers=4, default_timeout=10.0, cache=None, cache_ttl=3600, daily_quota=None,
+                 enrich_timeout=3.0):
+        """Initialize the YouTube tool handler with the given API key.
+        
+        Args:
+            api_key: YouTube Data API key
+            max_workers: Maximum number of tool calls running at once
+            default_timeout: Seconds a tool may run before it is reported as timed out
+            cache: Optional SharedCache for tool results and quota usage,
+                shared by every worker process
+            cache_ttl: Seconds tool results stay cached
+            daily_quota: API quota units available per day across all workers
+            enrich_timeout: Seconds video enrichment may take before the videos
+                are shown without details
+        """
+        self.api_key = api_key
+        self.default_timeout = default_timeout
+        self.cache = cache
+        self.cache_ttl = cache_ttl
+        self.daily_quota = daily_quota
+        self.enrich_timeout = enrich_timeout
+        self._local = threading.local()
+        self.tools = {}
+        self.tool_timeouts = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="youtube-tool")
+        
+        self.register_tool("search_video", self.search_video)
+        self.register_tool("get_trending_videos", self.get_trending_videos)
+        self.register_tool("get_mood_based_recommendation", self.get_mood_based_recommendation)
+    
+    @property
+    def youtube_client(self):
+        """Return this thread's YouTube API client.
+        
+        httplib2 connections are not thread-safe, so each worker thread gets
+        its own client whose Http object keeps connections alive between calls.
+        """
+        client = getattr(self._local, "client", None)
+        if client is None:
+            http = httplib2.Http(timeout=self.default_timeout)
+            client = build('youtube', 'v3', developerKey=self.api_key, http=http, cache_discovery=False)
+            self._local.client = client
+        return client
+    
+    def register_tool(self, tool_name, func, timeout=None):
+        """Register a tool so it can be dispatched by name.
+        
+        Args:
+            tool_name: Name used in tool invocations
+            func: Callable taking the invocation's keyword arguments
+            timeout: Per-tool timeout in seconds, defaults to default_timeout
+        """
+        self.tools[tool_name] = func
+        self.tool_timeouts[tool_name] = self.default_timeout if timeout is None else timeout
     
     def handle_tool_call(self, tool_name, **kwargs):
         """Handle a tool call with the given name and arguments."""
-        if tool_name in self.tools:
-            return self.tools[tool_name](**kwargs)
-        else:
+        if tool_name not in self.tools:
             return {"error": f"Unknown tool: {tool_name}"}
+        return self.tools[tool_name](**kwargs)
+    
+    def _cache_key(self, tool_name, kwargs):
+        """Return the shared cache key for an invocation, or None if caching is off."""
+        if self.cache is None or self.cache_ttl <= 0:
+            return None
+        return json.dumps([tool_name, kwargs], sort_keys=True, default=str)
+    
+    def _spend_quota(self, units):
+        """Reserve API quota units, returning False once the daily quota is used up."""
+        if self.cache is None or not self.daily_quota:
+            return True
+        granted = self.cache.consume_quota("youtube", units, self.daily_quota, 24 * 3600)
+        if not granted:
+            logger.warning("YouTube daily quota exhausted")
+        return granted
+    
+    def handle_tool_calls(self, invocations, enrich=True, deadline=None):
+        """Run several tool invocations concurrently.
+        
+        Args:
+            invocations: List of dicts with a "tool" name plus the tool's
+                keyword arguments, as returned by extract_tool_request
+            enrich: Whether to add duration, thumbnail and stats to the videos
+                found, using a single batched request for the whole turn
+            deadline: Optional time.monotonic() value by which the turn must
+                answer; no tool waits past it, whatever its own timeout
+        
+        Returns:
+            List of (tool_name, result) tuples in invocation order. Tools that
+            exceed their timeout report an unsuccessful result.
+        """
+        # Cached results were stored after enrichment, so hits need no API calls
+        submitted = []
+        for invocation in invocations:
+            kwargs = dict(invocation)
+            tool_name = kwargs.pop("tool")
+            cache_key = self._cache_key(tool_name, kwargs)
+            cached = self.cache.get("youtube", cache_key) if cache_key else None
+            if cached is not None:
+                submitted.append((tool_name, None, None, None, cached))
+                continue
+            future = submit_in_context(self._executor, self.handle_tool_call, tool_name, **kwargs)
+            tool_deadline = time.monotonic() + self.tool_timeouts.get(tool_name, self.default_timeout)
+            if deadline is not None:
+                tool_deadline = min(tool_deadline, deadline)
+            submitted.append((tool_name, future, tool_deadline, cache_key, None))
+        
+        results = []
+        fresh = []
+        for tool_name, future, tool_deadline, cache_key, cached in submitted:
+            if future is None:
+                results.append((tool_name, cached))
+                continue
+            try:
+                result = future.result(timeout=max(0.0, tool_deadline - time.monotonic()))
+            except FutureTimeoutError:
+                # Drop the call if it hasn't started, so it doesn't spend quota later
+                cancelled = future.cancel()
+                logger.warning(f"Tool {tool_name} timed out" + (" before it started" if cancelled else ""))
+                result = {"success": False, "error": f"{tool_name} timed out"}
+            except Exception as e:
+                logger.error(f"Tool {tool_name} failed: {e}", exc_info=True)
+                result = {"success": False, "error": str(e)}
+            results.append((tool_name, result))
+            fresh.append((cache_key, result))
+        
+        if not enrich:
+            return results
+        
+        # Only enriched results are cached; if enrichment timed out, a later turn retries it
+        enriched = self._enrich_within(
+            [video for _, result in fresh for video in result.get("results", [])],
+            deadline
+        )
+        if enriched:
+            for cache_key, result in fresh:
+                if cache_key and result.get("success"):
+                    self.cache.set("youtube", cache_key, result, self.cache_ttl)
+        return results
+    
+    def _enrich_within(self, videos, deadline=None):
+        """Enrich videos on the tool executor, giving up at enrich_timeout or the deadline.
+        
+        Details are fetched in the worker but applied here, so a lookup that
+        finishes late never modifies results the caller is already using.
+        
+        Returns:
+            True if enrichment finished, False if it timed out or failed
+        """
+        video_ids = _unique_video_ids(videos)
+        if not video_ids:
+            return True
+        
+        enrich_deadline = time.monotonic() + self.enrich_timeout
+        if deadline is not None:
+            enrich_deadline = min(enrich_deadline, deadline)
+        future = submit_in_context(self._executor, self._fetch_video_details, video_ids)
+        try:
+            details = future.result(timeout=max(0.0, enrich_deadline - time.monotonic()))
+        except FutureTimeoutError:
+            future.cancel()
+            logger.warning("Video enrichment timed out, showing videos without details")
+            return False
+        except Exception as e:
+            logger.warning(f"Video enrichment failed: {e}")
+            return False
+        _apply_video_details(videos, details)
+        return True
+    
+    def enrich_videos(self, videos):
+        """Add duration, thumbnail and view count to video results in place.
+        
+        Details for up to MAX_ENRICH_BATCH videos are fetched in one request.
+        Enrichment is best effort: on failure the videos are left unchanged.
+        """
+        try:
+            details = self._fetch_video_details(_unique_video_ids(videos))
+        except Exception as e:
+            logger.warning(f"Video enrichment failed: {e}")
+            return videos
+        return _apply_video_details(videos, details)
+    
+    def _fetch_video_details(self, video_ids):
+        """Return {video_id: details} for the given IDs using one batched request."""
+        if not video_ids or not self._spend_quota(LIST_QUOTA_COST):
+            return {}
+        
+        request = self.youtube_client.videos().list(
+            part="contentDetails,statistics,snippet",
+            id=",".join(video_ids),
+            maxResults=MAX_ENRICH_BATCH
+        )
+        response = request.execute()
+        
+        details = {}
+        for item in response.get("items", []):
+            thumbnails = item.get("snippet", {}).get("thumbnails", {})
+            thumbnail = thumbnails.get("medium") or thumbnails.get("default") or {}
+            details[item["id"]] = {
+                "duration": _format_duration(item.get("contentDetails", {}).get("duration", "")),
+                "thumbnail": thumbnail.get("url"),
+                "view_count": int(item.get("statistics", {}).get("viewCount", 0))
+            }
+        return details
     
     def search_video(self, query, max_results=1):
         """Search for videos matching the given query."""
+        if not self._spend_quota(SEARCH_QUOTA_COST):
+            return {"success": False, "error": "YouTube quota exhausted"}
         try:
             request = self.youtube_client.search().list(
                 q=query,
@@ -38,6 +245,7 @@ class YouTubeToolHandler:
                 title = item["snippet"]["title"]
                 url = f"https://www.youtube.com/watch?v={video_id}"
                 results.append({
+                    "video_id": video_id,
                     "title": title,
                     "url": url
                 })
@@ -54,6 +262,8 @@ class YouTubeToolHandler:
     
     def get_trending_videos(self, category="music", max_results=3):
         """Get trending videos in the specified category."""
+        if not self._spend_quota(LIST_QUOTA_COST):
+            return {"success": False, "error": "YouTube quota exhausted"}
         try:
             request = self.youtube_client.videos().list(
                 part="snippet",
@@ -69,6 +279,7 @@ class YouTubeToolHandler:
                 title = item["snippet"]["title"]
                 url = f"https://www.youtube.com/watch?v={video_id}"
                 results.append({
+                    "video_id": video_id,
                     "title": title,
                     "url": url
                 })
@@ -115,70 +326,91 @@ class YouTubeToolHandler:
         }
         return category_map.get(category_name, "10")  # Default to music
 
-def initialize_youtube(api_key):
+def _unique_video_ids(videos):
+    """Return the distinct video IDs among the results, capped at one batch."""
+    video_ids = []
+    for video in videos:
+        video_id = video.get("video_id") if isinstance(video, dict) else None
+        if video_id and video_id not in video_ids:
+            video_ids.append(video_id)
+    return video_ids[:MAX_ENRICH_BATCH]
+
+def _apply_video_details(videos, details):
+    """Merge fetched details into the matching video results in place."""
+    for video in videos:
+        if isinstance(video, dict) and video.get("video_id") in details:
+            video.update(details[video["video_id"]])
+    return videos
+
+def _format_duration(iso_duration):
+    """Convert an ISO 8601 duration like PT1H2M3S into 1:02:03."""
+    match = re.match(r'^PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?$', iso_duration or "")
+    if not match:
+        return None
+    hours, minutes, seconds = (int(part or 0) for part in match.groups())
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+def initialize_youtube(api_key, cache=None, cache_ttl=3600, daily_quota=None):
     """Initialize the YouTube API client with the provided API key."""
-    return YouTubeToolHandler(api_key)
+    return YouTubeToolHandler(api_key, cache=cache, cache_ttl=cache_ttl, daily_quota=daily_quota)
+
+# Direct video request patterns, combined so the message is scanned once
+DIRECT_REQUEST_PATTERN = re.compile('|'.join(f'(?:{pattern})' for pattern in [
+    r'(show|provide|give|send|get|find)(\s+me)?\s+a\s+video',
+    r'(can|could)\s+you\s+(show|provide|give|send|get|find)(\s+me)?\s+a\s+video',
+    r'(i\s+want|i\'d\s+like|please\s+show)\s+(to\s+see\s+)?(a\s+)?video',
+    r'video\s+of',
+    r'videos?\s+(about|on|showing|featuring)',
+    r'(watch|see)\s+(a\s+)?videos?'
+]))
+
+# Original patterns
+VIDEO_KEYWORDS_PATTERN = re.compile(r'\b(watch|look|see|show|gaze|glance|stare|peek|scan|view|notice|spot|glimpse|behold|catch)\b.*\b(video|play|film|clip|movie|watch)\b')
+TOOL_KEYWORDS_PATTERN = re.compile(r'\b(search|find|get|recommend|suggest)\b.*\b(video|youtube|clip|music)\b')
+
+# Tool request patterns, matched against the original text to keep the query's case
+SEARCH_PATTERN = re.compile(r'\b(search|find|look for)\b.*\b(video|videos)\b.*\b(about|on|for|of)\b\s+(.+)', re.IGNORECASE)
+TRENDING_PATTERN = re.compile(r'\b(trending|popular)\b.*\b(videos|music)\b.*\b(in|on|about)\b\s+(.+)', re.IGNORECASE)
+DIRECT_VIDEO_PATTERN = re.compile(r'(video|videos)(\s+of|\s+about|\s+on|\s+showing|\s+featuring)?\s+(.+)', re.IGNORECASE)
 
 def detect_video_request(message):
-    """Detect if the user's message contains a video request."""
-    # Direct video request patterns
-    direct_request_patterns = [
-        r'(show|provide|give|send|get|find)(\s+me)?\s+a\s+video',
-        r'(can|could)\s+you\s+(show|provide|give|send|get|find)(\s+me)?\s+a\s+video',
-        r'(i\s+want|i\'d\s+like|please\s+show)\s+(to\s+see\s+)?(a\s+)?video',
-        r'video\s+of',
-        r'videos?\s+(about|on|showing|featuring)',
-        r'(watch|see)\s+(a\s+)?videos?'
-    ]
-    
-    # Check for direct video requests
-    for pattern in direct_request_patterns:
-        if re.search(pattern, message.lower(), re.IGNORECASE):
-            return True
-    
-    # Original patterns
-    video_keywords = r'\b(watch|look|see|show|gaze|glance|stare|peek|scan|view|notice|spot|glimpse|behold|catch)\b.*\b(video|play|film|clip|movie|watch)\b'
-    tool_keywords = r'\b(search|find|get|recommend|suggest)\b.*\b(video|youtube|clip|music)\b'
-    
-    if re.search(video_keywords, message, re.IGNORECASE) or re.search(tool_keywords, message, re.IGNORECASE):
-        return True
-    
-    return False
+    """Detect if the user's message (raw text or ParsedMessage) contains a video request."""
+    text = parse_message(message).lower
+    return bool(
+        DIRECT_REQUEST_PATTERN.search(text)
+        or VIDEO_KEYWORDS_PATTERN.search(text)
+        or TOOL_KEYWORDS_PATTERN.search(text)
+    )
 
 def extract_tool_request(message):
-    """Extract the tool request from the user's message."""
-    # Check for specific tool patterns
-    search_pattern = r'\b(search|find|look for)\b.*\b(video|videos)\b.*\b(about|on|for|of)\b\s+(.+)'
-    trending_pattern = r'\b(trending|popular)\b.*\b(videos|music)\b.*\b(in|on|about)\b\s+(.+)'
-    
-    # Direct video request pattern
-    direct_video_pattern = r'(video|videos)(\s+of|\s+about|\s+on|\s+showing|\s+featuring)?\s+(.+)'
-    
-    search_match = re.search(search_pattern, message, re.IGNORECASE)
-    trending_match = re.search(trending_pattern, message, re.IGNORECASE)
-    direct_match = re.search(direct_video_pattern, message, re.IGNORECASE)
+    """Extract the tool request from the user's message (raw text or ParsedMessage)."""
+    text = parse_message(message).raw
     
+    search_match = SEARCH_PATTERN.search(text)
     if search_match:
-        query = search_match.group(4).strip()
         return {
             "tool": "search_video",
-            "query": query
+            "query": search_match.group(4).strip()
         }
-    elif trending_match:
-        category = trending_match.group(4).strip()
+    
+    trending_match = TRENDING_PATTERN.search(text)
+    if trending_match:
         return {
             "tool": "get_trending_videos",
-            "category": category
+            "category": trending_match.group(4).strip()
         }
-    elif direct_match:
-        query = direct_match.group(3).strip()
+    
+    direct_match = DIRECT_VIDEO_PATTERN.search(text)
+    if direct_match:
         return {
             "tool": "search_video",
-            "query": query
+            "query": direct_match.group(3).strip()
         }
-    else:
-        # Default to a simple search with the entire message
-        return {
-            "tool": "search_video",
-            "query": message.strip()
-        } 
\ No newline at end of file
+    
+    # Default to a simple search with the entire message
+    return {
+        "tool": "search_video",
+        "query": text.strip()
+    }
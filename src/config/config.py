@@ -12,8 +12,37 @@ def load_config():
     
     config = {
         "openai_api_key": os.getenv("OPENAI_API_KEY"),
+        "openai_base_url": os.getenv("OPENAI_BASE_URL") or None,
+        "openai_timeout": float(os.getenv("OPENAI_TIMEOUT", "30")),
+        "openai_max_connections": int(os.getenv("OPENAI_MAX_CONNECTIONS", "20")),
+        "openai_max_keepalive": int(os.getenv("OPENAI_MAX_KEEPALIVE", "10")),
+        "openai_keepalive_expiry": float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "30")),
+        "openai_http2": os.getenv("OPENAI_HTTP2", "false").lower() == "true",
         "youtube_api_key": os.getenv("YOUTUBE_API_KEY"),
-        "db_path": PROJECT_ROOT / "journal.db"
+        "db_path": PROJECT_ROOT / "journal.db",
+        "archive_dir": PROJECT_ROOT / "archive",
+        "archive_after_days": int(os.getenv("ARCHIVE_AFTER_DAYS", "0")),
+        "archive_interval_hours": float(os.getenv("ARCHIVE_INTERVAL_HOURS", "24")),
+        "backup_dir": PROJECT_ROOT / "backups",
+        "backup_interval_hours": float(os.getenv("BACKUP_INTERVAL_HOURS", "0")),
+        "backup_retention": int(os.getenv("BACKUP_RETENTION", "7")),
+        "model_routing_policy": os.getenv("MODEL_ROUTING_POLICY"),
+        "route_stats_interval_minutes": float(os.getenv("ROUTE_STATS_INTERVAL_MINUTES", "15")),
+        "reflection_budget": float(os.getenv("REFLECTION_LATENCY_BUDGET", "8")),
+        "append_late_reflection": os.getenv("APPEND_LATE_REFLECTION", "true").lower() == "true",
+        "late_reflection_timeout": float(os.getenv("LATE_REFLECTION_TIMEOUT", "60")),
+        "chat_concurrency": int(os.getenv("CHAT_CONCURRENCY", "16")),
+        "log_stage_sample_rate": float(os.getenv("LOG_STAGE_SAMPLE_RATE", "1.0")),
+        "profile_sample_rate": float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+        "profile_dump_every": int(os.getenv("PROFILE_DUMP_EVERY", "50")),
+        "web_workers": int(os.getenv("WEB_WORKERS", "1")),
+        "server_host": os.getenv("SERVER_HOST", "127.0.0.1"),
+        "server_port": int(os.getenv("SERVER_PORT", "7860")),
+        "worker_port_start": int(os.getenv("WORKER_PORT_START", "7870")),
+        "shared_cache_path": PROJECT_ROOT / "shared_cache.db",
+        "reflection_cache_ttl": int(os.getenv("REFLECTION_CACHE_TTL", "3600")),
+        "youtube_cache_ttl": int(os.getenv("YOUTUBE_CACHE_TTL", "3600")),
+        "youtube_daily_quota": int(os.getenv("YOUTUBE_DAILY_QUOTA", "10000"))
     }
     
     return config
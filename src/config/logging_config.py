@@ -1,47 +1,224 @@
+import atexit
+import copy
+import json
 import logging
+import queue
+import random
 import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Iterator, Optional
 
-def setup_logging(log_dir: Path = Path("logs")) -> None:
+# Request ID of the chat turn being handled, attached to every log record
+_request_id: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_STANDARD_ATTRS = set(logging.LogRecord("", 0, "", 0, "", None, None).__dict__) | {"message", "asctime"}
+
+# Background listener doing the formatting and file/stdout writes
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+_stage_sample_rate = 1.0
+
+def new_request_id() -> str:
+    """Start a new request context and return its ID."""
+    request_id = uuid.uuid4().hex[:12]
+    _request_id.set(request_id)
+    return request_id
+
+def get_request_id() -> str:
+    """Return the ID of the current request, or '-' outside a request."""
+    return _request_id.get()
+
+@contextmanager
+def stage_timer(stage: str, logger: Optional[logging.Logger] = None) -> Iterator[None]:
+    """Log how long a stage of the current request took.
+
+    Records are emitted with `stage` and `duration_ms` fields and are sampled
+    at the rate configured in setup_logging.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration_ms = (time.perf_counter() - start) * 1000
+        (logger or logging.getLogger("timing")).info(
+            f"Stage {stage} took {duration_ms:.1f}ms",
+            extra={"stage": stage, "duration_ms": round(duration_ms, 2), "sample_rate": _stage_sample_rate}
+        )
+
+class RequestContextFilter(logging.Filter):
+    """Attach the current request ID to each record."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        return True
+
+class RateLimitFilter(logging.Filter):
+    """Sample and rate-limit high-volume records before they reach the queue.
+
+    Records may carry a `sample_rate` extra between 0 and 1. On top of that,
+    each log call site may emit at most `burst` records per `interval`
+    seconds. Call sites are told apart by an `event` extra when given, else by
+    logger name, file and line, since messages are usually f-strings. Warnings
+    and errors are never dropped.
+    """
+
+    def __init__(self, burst: int = 20, interval: float = 1.0):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self._windows = {}
+        self._last_sweep = time.monotonic()
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+
+        sample_rate = getattr(record, "sample_rate", 1.0)
+        if sample_rate < 1.0 and random.random() >= sample_rate:
+            return False
+
+        event = getattr(record, "event", None)
+        key = (record.name, event) if event is not None else (record.name, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_sweep >= self.interval:
+                self._sweep(now)
+            window_start, count = self._windows.get(key, (now, 0))
+            if now - window_start >= self.interval:
+                window_start, count = now, 0
+            if count >= self.burst:
+                self._windows[key] = (window_start, count)
+                return False
+            self._windows[key] = (window_start, count + 1)
+        return True
+
+    def _sweep(self, now: float) -> None:
+        """Drop expired windows; callers must hold the lock."""
+        self._windows = {
+            key: window for key, window in self._windows.items()
+            if now - window[0] < self.interval
+        }
+        self._last_sweep = now
+
+class StructuredQueueHandler(QueueHandler):
+    """Queue handler that keeps tracebacks apart from the message.
+
+    QueueHandler.prepare folds the traceback into the message and clears
+    exc_info, since exception objects can't be pickled. This keeps the message
+    as logged and carries the formatted traceback in exc_text instead, so the
+    console still prints it and JSON records get their own exc_info field.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and key not in payload and key != "sample_rate":
+                payload[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc_info"] = record.exc_text
+        if record.stack_info:
+            payload["stack_info"] = record.stack_info
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+def setup_logging(log_dir: Path = Path("logs"), stage_sample_rate: float = 1.0, log_file: str = "app.log") -> None:
     """Configure logging for the application.
-    
+
+    Log calls only put records on a queue; a background listener formats them
+    and writes to the log file (JSON lines) and stdout. Calling this again
+    replaces the previous pipeline instead of adding duplicate handlers.
+
     Args:
         log_dir: Directory to store log files
+        stage_sample_rate: Fraction of stage timing records to keep
+        log_file: Name of the log file; each worker process needs its own
     """
+    global _listener, _queue_handler, _stage_sample_rate
+
     # Create logs directory if it doesn't exist
     log_dir.mkdir(exist_ok=True)
-    
+    _stage_sample_rate = stage_sample_rate
+
     # Configure root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(logging.INFO)
-    
+
+    # Tear down a previous pipeline so handlers aren't duplicated
+    shutdown_logging()
+
     # Create formatters
-    file_formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
+    file_formatter = JsonFormatter()
     console_formatter = logging.Formatter(
-        '%(levelname)s: %(message)s'
+        '%(levelname)s: [%(request_id)s] %(message)s'
     )
-    
+
     # File handler (rotating log files)
     file_handler = RotatingFileHandler(
-        log_dir / "app.log",
+        log_dir / log_file,
         maxBytes=1024 * 1024,  # 1MB
         backupCount=5
     )
     file_handler.setFormatter(file_formatter)
     file_handler.setLevel(logging.INFO)
-    
+
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(console_formatter)
     console_handler.setLevel(logging.INFO)
-    
-    # Add handlers to root logger
-    root_logger.addHandler(file_handler)
-    root_logger.addHandler(console_handler)
-    
+
+    # Hot path: only enqueue records; the listener thread does the I/O
+    log_queue = queue.Queue(-1)
+    _queue_handler = StructuredQueueHandler(log_queue)
+    _queue_handler.addFilter(RequestContextFilter())
+    _queue_handler.addFilter(RateLimitFilter())
+    root_logger.addHandler(_queue_handler)
+
+    _listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    _listener.start()
+
     # Set specific logger levels
     logging.getLogger("urllib3").setLevel(logging.WARNING)
-    logging.getLogger("openai").setLevel(logging.WARNING) 
\ No newline at end of file
+    logging.getLogger("openai").setLevel(logging.WARNING)
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the background listener."""
+    global _listener, _queue_handler
+
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+atexit.register(shutdown_logging)
@@ -13,6 +13,7 @@ Avoid giving labels or categorizing the user's emotions. Your tone should be kin
 INTRO_MESSAGE = "Hello there!😊 I'm Mirror, here to reflect on your thoughts and provide insights."
 NAME_REQUEST = "Can I ask how you'd like me to address you?"
 GREETING_RESPONSE = "Hello! It's nice to chat with you. How are you feeling today?"
+LATE_REFLECTION_MESSAGE = "A few more thoughts on what you shared:\n\n{}"
 
 # Error messages
 ERROR_MISSING_ENV = "❌ Error: Missing required environment variables: {}"
@@ -0,0 +1,328 @@
+import gzip
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+LOCK_NAME = ".lock"
+
+# Rows written per segment, which bounds the memory an archiving run or a
+# segment read needs
+SEGMENT_MAX_ROWS = 5000
+
+class SegmentCache:
+    """Decoded segments kept in memory, bounded by their approximate size.
+
+    Segments are immutable, but a restore may put a different file under a
+    name seen before, so entries are keyed on the file's inode and mtime too.
+    """
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024):
+        """Initialize the cache holding up to about `max_bytes` of entry text."""
+        self.max_bytes = max_bytes
+        self._segments: "OrderedDict[Tuple[str, int, int], Tuple[Tuple[Dict, ...], int]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> Tuple[Dict, ...]:
+        """Return a segment's rows, oldest first, reading it on a miss."""
+        stat = os.stat(path)
+        key = (path, stat.st_ino, stat.st_mtime_ns)
+        with self._lock:
+            if key in self._segments:
+                self._segments.move_to_end(key)
+                return self._segments[key][0]
+
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            lines = f.readlines()
+        rows = tuple(json.loads(line) for line in lines)
+        size = sum(len(line) for line in lines)
+
+        with self._lock:
+            if size <= self.max_bytes and key not in self._segments:
+                self._segments[key] = (rows, size)
+                self._size += size
+                while self._size > self.max_bytes:
+                    _, (_, evicted_size) = self._segments.popitem(last=False)
+                    self._size -= evicted_size
+        return rows
+
+_segment_cache = SegmentCache()
+
+def row_mood_version(row: Dict) -> int:
+    """Return the classifier version of an archived row, 0 if it was never versioned."""
+    if not row.get("content_hash"):
+        return 0
+    return row.get("mood_version") or 0
+
+class ArchiveStore:
+    """Immutable, compressed segments of old journal entries.
+
+    Each segment is a gzipped JSON-lines file written once and never
+    modified. A small manifest lists the segments with their id and timestamp
+    ranges, per-mood counts and classifier versions, so reads and the mood
+    re-classification job can skip segments without opening them. Segments
+    are only ever replaced as a whole, by a new file and a manifest swap.
+    """
+
+    def __init__(self, archive_dir: Path):
+        """Initialize the archive in the given directory."""
+        self.archive_dir = Path(archive_dir)
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._manifest_cache = (None, {"segments": []})
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.archive_dir / MANIFEST_NAME
+
+    def load_manifest(self) -> Dict:
+        """Return the manifest, or an empty one if nothing was archived yet."""
+        try:
+            mtime = self.manifest_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return {"segments": []}
+        if self._manifest_cache[0] != mtime:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                self._manifest_cache = (mtime, json.load(f))
+        return self._manifest_cache[1]
+
+    def _write_atomic(self, path: Path, data: bytes) -> None:
+        """Write a file so readers never see it half-written."""
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Serialize manifest updates across threads and processes.
+
+        The app's archiver and the re-classification CLI may both update the
+        manifest, so a thread lock alone isn't enough.
+        """
+        with self._lock, open(self.archive_dir / LOCK_NAME, "a+b") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _next_file_name(self, segments: List[Dict]) -> str:
+        """Return an unused segment file name."""
+        numbers = [int(match.group(1)) for segment in segments
+                   if (match := re.match(r"segment-(\d+)", segment["file"]))]
+        return f"segment-{max(numbers, default=0) + 1:06d}.jsonl.gz"
+
+    def _write_segment_file(self, file_name: str, rows: List[Dict]) -> Dict:
+        """Write rows to a segment file and return its manifest record."""
+        payload = "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+        self._write_atomic(self.archive_dir / file_name, gzip.compress(payload.encode("utf-8")))
+
+        moods: Dict[str, int] = {}
+        for row in rows:
+            moods[row["mood"]] = moods.get(row["mood"], 0) + 1
+        return {
+            "file": file_name,
+            "count": len(rows),
+            "min_id": rows[0]["id"],
+            "max_id": rows[-1]["id"],
+            "min_timestamp": rows[0]["timestamp"],
+            "max_timestamp": rows[-1]["timestamp"],
+            "moods": moods,
+            "mood_versions": sorted({row_mood_version(row) for row in rows})
+        }
+
+    def write_segment(self, rows: List[Dict]) -> Dict:
+        """Write rows (oldest first) to a new segment and register it.
+
+        Args:
+            rows: Entry rows with id, entry, mood and timestamp keys
+
+        Returns:
+            The segment's manifest record
+        """
+        with self._locked():
+            manifest = {"segments": list(self.load_manifest()["segments"])}
+            segment = self._write_segment_file(self._next_file_name(manifest["segments"]), rows)
+            manifest["segments"].append(segment)
+            self._write_atomic(self.manifest_path, json.dumps(manifest, indent=2).encode("utf-8"))
+
+        logger.info(f"Archived {len(rows)} entries to {segment['file']}")
+        return segment
+
+    def replace_segment(self, segment: Dict, rows: List[Dict]) -> Dict:
+        """Replace a segment's rows, e.g. after re-classifying their moods.
+
+        The rows are written to a new file and swapped into the segment's
+        place in the manifest; the old file is removed afterwards.
+
+        Args:
+            segment: Manifest record of the segment to replace
+            rows: The segment's updated rows, oldest first
+
+        Returns:
+            The new segment's manifest record
+
+        Raises:
+            KeyError: If the segment is no longer in the manifest
+        """
+        with self._locked():
+            manifest = {"segments": list(self.load_manifest()["segments"])}
+            files = [existing["file"] for existing in manifest["segments"]]
+            if segment["file"] not in files:
+                raise KeyError(f"Segment {segment['file']} is not in the manifest")
+            replacement = self._write_segment_file(self._next_file_name(manifest["segments"]), rows)
+            manifest["segments"][files.index(segment["file"])] = replacement
+            self._write_atomic(self.manifest_path, json.dumps(manifest, indent=2).encode("utf-8"))
+            (self.archive_dir / segment["file"]).unlink(missing_ok=True)
+
+        logger.info(f"Replaced archive segment {segment['file']} with {replacement['file']}")
+        return replacement
+
+    def snapshot(self, target_dir: Path) -> int:
+        """Copy the manifest and every segment it lists into target_dir.
+
+        Segments are immutable, so they are hard-linked where the filesystem
+        allows it and the snapshot costs almost nothing.
+
+        Returns:
+            Number of segments in the snapshot
+        """
+        with self._locked():
+            manifest = self.load_manifest()
+            target_dir.mkdir(parents=True, exist_ok=True)
+            for segment in manifest["segments"]:
+                _link_or_copy(self.archive_dir / segment["file"], target_dir / segment["file"])
+            self._write_atomic(target_dir / MANIFEST_NAME, json.dumps(manifest, indent=2).encode("utf-8"))
+        return len(manifest["segments"])
+
+    def restore_snapshot(self, snapshot_dir: Path) -> None:
+        """Replace the archive's contents with a snapshot taken by snapshot()."""
+        with open(snapshot_dir / MANIFEST_NAME, encoding="utf-8") as f:
+            manifest = json.load(f)
+        with self._locked():
+            keep = {segment["file"] for segment in manifest["segments"]}
+            for file_name in keep:
+                # A later segment may have reused the name, so always replace
+                tmp_path = self.archive_dir / (file_name + ".tmp")
+                tmp_path.unlink(missing_ok=True)
+                _link_or_copy(snapshot_dir / file_name, tmp_path)
+                os.replace(tmp_path, self.archive_dir / file_name)
+            self._write_atomic(self.manifest_path, json.dumps(manifest, indent=2).encode("utf-8"))
+            for path in self.archive_dir.glob("segment-*.jsonl.gz"):
+                if path.name not in keep:
+                    path.unlink()
+        logger.info(f"Restored archive {self.archive_dir} from {snapshot_dir}")
+
+    def read_segment(self, segment: Dict) -> Tuple[Dict, ...]:
+        """Return the rows of a segment, oldest first."""
+        return _segment_cache.get(str(self.archive_dir / segment["file"]))
+
+    def last_segment_rows(self) -> Tuple[Dict, ...]:
+        """Return the rows stored in the newest segment."""
+        segments = self.load_manifest()["segments"]
+        if not segments:
+            return ()
+        return self.read_segment(segments[-1])
+
+    def get_recent_entries(self, limit: int, mood: Optional[str] = None) -> List[Tuple[str, str, str]]:
+        """Return up to `limit` archived entries, newest first.
+
+        Args:
+            limit: Maximum number of entries to return
+            mood: Only return entries with this mood
+
+        Returns:
+            List of tuples containing (entry, mood, timestamp)
+        """
+        try:
+            return self._read_recent_entries(limit, mood)
+        except FileNotFoundError:
+            # A segment was replaced after the manifest was read; read the new one
+            self._manifest_cache = (None, {"segments": []})
+            return self._read_recent_entries(limit, mood)
+
+    def _read_recent_entries(self, limit: int, mood: Optional[str]) -> List[Tuple[str, str, str]]:
+        results = []
+        for segment in reversed(self.load_manifest()["segments"]):
+            if len(results) >= limit:
+                break
+            if mood is not None and not segment["moods"].get(mood):
+                continue
+            for row in reversed(self.read_segment(segment)):
+                if mood is None or row["mood"] == mood:
+                    results.append((row["entry"], row["mood"], row["timestamp"]))
+                    if len(results) >= limit:
+                        break
+        return results
+
+def verify_snapshot(snapshot_dir: Path) -> bool:
+    """Return True if every segment listed in a snapshot's manifest is readable."""
+    try:
+        with open(snapshot_dir / MANIFEST_NAME, encoding="utf-8") as f:
+            manifest = json.load(f)
+        for segment in manifest["segments"]:
+            with gzip.open(snapshot_dir / segment["file"], "rt", encoding="utf-8") as f:
+                if sum(1 for _ in f) != segment["count"]:
+                    return False
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Failed to verify archive snapshot {snapshot_dir}: {e}")
+        return False
+    return True
+
+def _link_or_copy(source: Path, target: Path) -> None:
+    """Hard-link an immutable file, copying it if linking isn't possible."""
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+def schedule_archiving(journal_db, older_than_days: int, interval_seconds: float) -> threading.Thread:
+    """Periodically archive old entries from the journal database.
+
+    Args:
+        journal_db: JournalDatabase configured with an archive directory
+        older_than_days: Age after which entries move to the archive
+        interval_seconds: Time between archiving runs
+
+    Returns:
+        The background (daemon) thread running the schedule
+    """
+    def run() -> None:
+        while True:
+            try:
+                journal_db.archive_entries(older_than_days)
+            except Exception as e:
+                logger.error(f"Archiving run failed: {e}", exc_info=True)
+            time.sleep(interval_seconds)
+
+    thread = threading.Thread(target=run, name="journal-archiver", daemon=True)
+    thread.start()
+    return thread
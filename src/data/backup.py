@@ -0,0 +1,261 @@
+"""Online backups of the journal database.
+
+Backups use SQLite's online backup API, copying a few pages per step and
+pausing between steps so chat turns keep writing while a backup runs. When
+old entries are tiered into archive segments, the archive is snapshotted
+next to the database copy; segments are immutable, so they are hard-linked.
+Each backup is integrity-checked before it is kept, and old backups are pruned.
+
+Usage:
+    python -m src.data.backup              # take a backup now
+    python -m src.data.backup --list
+    python -m src.data.backup --verify PATH
+    python -m src.data.backup --restore PATH   # stop the app first
+"""
+import argparse
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+from src.config.config import load_config
+from src.config.logging_config import setup_logging
+from src.data.archive import ArchiveStore, verify_snapshot
+from src.data.journal_db import JournalDatabase
+
+logger = logging.getLogger(__name__)
+
+BACKUP_PREFIX = "journal-"
+BACKUP_SUFFIX = ".db"
+ARCHIVE_SUFFIX = ".archive"
+
+class BackupRestarted(Exception):
+    """Raised when writers keep restarting a stepped backup."""
+
+def archive_snapshot_path(backup_path: Path) -> Path:
+    """Return the directory holding a backup's archive snapshot."""
+    return backup_path.with_suffix(ARCHIVE_SUFFIX)
+
+def verify_backup(backup_path: Path) -> bool:
+    """Return True if the backup passes SQLite's integrity check and its
+    archive snapshot, if any, is readable."""
+    snapshot_dir = archive_snapshot_path(backup_path)
+    if snapshot_dir.exists() and not verify_snapshot(snapshot_dir):
+        return False
+    try:
+        conn = sqlite3.connect(f"file:{backup_path}?mode=ro", uri=True)
+        try:
+            result = conn.execute('PRAGMA integrity_check').fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.error(f"Failed to verify backup {backup_path}: {e}")
+        return False
+    return result is not None and result[0] == "ok"
+
+def list_backups(backup_dir: Path) -> List[Path]:
+    """Return the backups in the directory, oldest first."""
+    if not backup_dir.exists():
+        return []
+    return sorted(backup_dir.glob(f"{BACKUP_PREFIX}*{BACKUP_SUFFIX}"))
+
+def backup_database(db_path: Path, backup_dir: Path, pages_per_step: int = 64,
+                    step_pause: float = 0.005, max_restarts: int = 5,
+                    archive_dir: Optional[Path] = None) -> Path:
+    """Copy the database to a new, verified backup file.
+
+    The archive is snapshotted after the database copy, so an archiving run
+    in between can only leave an entry in both places, which restore_backup
+    cleans up, never in neither.
+
+    Args:
+        db_path: Path to the live journal database
+        backup_dir: Directory where backups are stored
+        pages_per_step: Pages copied per backup step
+        step_pause: Seconds to yield to writers between steps
+        max_restarts: Times a write may restart the stepped copy before the
+            backup falls back to a single-step snapshot, which doesn't block
+            writers on a WAL database
+        archive_dir: Archive directory to snapshot alongside the database
+
+    Returns:
+        Path to the new backup
+
+    Raises:
+        sqlite3.Error: If the backup fails or doesn't pass verification
+    """
+    backup_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    backup_path = backup_dir / f"{BACKUP_PREFIX}{stamp}{BACKUP_SUFFIX}"
+    partial_path = backup_path.with_name(backup_path.name + ".partial")
+
+    last_remaining = None
+    restarts = 0
+
+    def progress(status, remaining, total):
+        # A write from another connection makes the copy start over
+        nonlocal last_remaining, restarts
+        if last_remaining is not None and remaining > last_remaining:
+            restarts += 1
+            if restarts > max_restarts:
+                raise BackupRestarted()
+        last_remaining = remaining
+        time.sleep(step_pause)
+
+    start = time.perf_counter()
+    source = sqlite3.connect(db_path)
+    target = sqlite3.connect(partial_path)
+    try:
+        try:
+            source.backup(target, pages=pages_per_step, progress=progress)
+        except BackupRestarted:
+            logger.warning("Backup kept restarting under writes, taking a single-step snapshot")
+            source.backup(target)
+    except sqlite3.Error as e:
+        logger.error(f"Failed to back up database: {e}")
+        target.close()
+        partial_path.unlink(missing_ok=True)
+        raise
+    finally:
+        target.close()
+        source.close()
+
+    snapshot_dir = archive_snapshot_path(backup_path)
+    try:
+        if archive_dir and Path(archive_dir).exists():
+            ArchiveStore(archive_dir).snapshot(snapshot_dir)
+        verified = verify_backup(partial_path) and (not snapshot_dir.exists() or verify_snapshot(snapshot_dir))
+    except OSError as e:
+        logger.error(f"Failed to snapshot archive: {e}")
+        verified = False
+    if not verified:
+        partial_path.unlink(missing_ok=True)
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+        raise sqlite3.DatabaseError(f"Backup {backup_path.name} failed integrity check")
+
+    os.replace(partial_path, backup_path)
+    logger.info(f"Backed up {db_path} to {backup_path} in {time.perf_counter() - start:.2f}s")
+    return backup_path
+
+def prune_backups(backup_dir: Path, retention: int) -> List[Path]:
+    """Delete all but the newest `retention` backups and return the removed paths."""
+    backups = list_backups(backup_dir)
+    removed = backups[:-retention] if retention > 0 else []
+    for path in removed:
+        path.unlink()
+        shutil.rmtree(archive_snapshot_path(path), ignore_errors=True)
+        logger.info(f"Removed old backup {path.name}")
+    return removed
+
+def restore_backup(backup_path: Path, db_path: Path, archive_dir: Optional[Path] = None) -> None:
+    """Replace the database contents with a verified backup.
+
+    The restore copies the backup in a single step while holding the write
+    lock, so the app should be stopped first. When an archive directory is
+    given, the archive is rolled back to the backup's snapshot if it has
+    one, and hot rows that are also in the archive are dropped, so entries
+    archived after the backup was taken aren't returned twice.
+
+    Raises:
+        sqlite3.Error: If the backup is corrupt or the restore fails
+    """
+    if not verify_backup(backup_path):
+        raise sqlite3.DatabaseError(f"Refusing to restore {backup_path}: integrity check failed")
+
+    source = sqlite3.connect(f"file:{backup_path}?mode=ro", uri=True)
+    target = sqlite3.connect(db_path)
+    try:
+        source.backup(target)
+    except sqlite3.Error as e:
+        logger.error(f"Failed to restore backup: {e}")
+        raise
+    finally:
+        target.close()
+        source.close()
+
+    if archive_dir:
+        snapshot_dir = archive_snapshot_path(backup_path)
+        if snapshot_dir.exists():
+            ArchiveStore(archive_dir).restore_snapshot(snapshot_dir)
+        JournalDatabase(db_path, archive_dir).drop_archived_duplicates()
+    logger.info(f"Restored {db_path} from {backup_path}")
+
+class BackupService:
+    """Take backups on a schedule in a background thread."""
+
+    def __init__(self, db_path: Path, backup_dir: Path, interval_seconds: float, retention: int = 7,
+                 archive_dir: Optional[Path] = None):
+        """Initialize the service.
+
+        Args:
+            db_path: Path to the live journal database
+            backup_dir: Directory where backups are stored
+            interval_seconds: Time between backups
+            retention: Number of backups to keep
+            archive_dir: Archive directory snapshotted with each backup
+        """
+        self.db_path = db_path
+        self.archive_dir = archive_dir
+        self.backup_dir = backup_dir
+        self.interval_seconds = interval_seconds
+        self.retention = retention
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self) -> Path:
+        """Take one backup and prune old ones."""
+        backup_path = backup_database(self.db_path, self.backup_dir, archive_dir=self.archive_dir)
+        prune_backups(self.backup_dir, self.retention)
+        return backup_path
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Scheduled backup failed: {e}", exc_info=True)
+            self._stop.wait(self.interval_seconds)
+
+    def start(self) -> None:
+        """Start taking backups in the background."""
+        self._thread = threading.Thread(target=self._run, name="journal-backup", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the schedule after the current backup finishes."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+def main() -> None:
+    """Back up, list, verify or restore the configured journal database."""
+    parser = argparse.ArgumentParser(description="Back up or restore journal.db")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--list", action="store_true", help="List existing backups")
+    group.add_argument("--verify", type=Path, metavar="PATH", help="Check a backup's integrity")
+    group.add_argument("--restore", type=Path, metavar="PATH", help="Restore journal.db from a backup")
+    args = parser.parse_args()
+
+    setup_logging()
+    config = load_config()
+
+    if args.list:
+        for path in list_backups(config["backup_dir"]):
+            print(path)
+    elif args.verify:
+        ok = verify_backup(args.verify)
+        print(f"{args.verify}: {'ok' if ok else 'CORRUPT'}")
+        if not ok:
+            raise SystemExit(1)
+    elif args.restore:
+        restore_backup(args.restore, config["db_path"], config["archive_dir"])
+    else:
+        backup_database(config["db_path"], config["backup_dir"], archive_dir=config["archive_dir"])
+        prune_backups(config["backup_dir"], config["backup_retention"])
+
+if __name__ == "__main__":
+    main()
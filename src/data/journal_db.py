@@ -1,14 +1,27 @@
 import sqlite3
+import hashlib
 from pathlib import Path
 from typing import List, Tuple, Optional
 import logging
+from src.data.archive import ArchiveStore, SEGMENT_MAX_ROWS
 
 logger = logging.getLogger(__name__)
 
+def content_hash(entry: str) -> str:
+    """Return the hash used to detect changed entry text."""
+    return hashlib.sha256(entry.encode("utf-8")).hexdigest()
+
 class JournalDatabase:
-    def __init__(self, db_path: Path):
-        """Initialize the journal database with the given path."""
+    def __init__(self, db_path: Path, archive_dir: Optional[Path] = None):
+        """Initialize the journal database with the given path.
+
+        Args:
+            db_path: Path to the hot SQLite database
+            archive_dir: Directory of compressed archive segments. When set,
+                old entries can be archived and reads fall through to them.
+        """
         self.db_path = db_path
+        self.archive = ArchiveStore(archive_dir) if archive_dir else None
         self._init_db()
     
     def _init_db(self) -> None:
@@ -16,25 +29,40 @@ class JournalDatabase:
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
+                # WAL lets worker processes read while another one writes
+                cursor.execute('PRAGMA journal_mode=WAL')
                 cursor.execute('''
                     CREATE TABLE IF NOT EXISTS entries (
                         id INTEGER PRIMARY KEY,
                         entry TEXT NOT NULL,
                         mood TEXT NOT NULL,
-                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        mood_version INTEGER,
+                        content_hash TEXT
                     )
                 ''')
+
+                # Databases created before moods were versioned lack these columns
+                columns = {row[1] for row in cursor.execute('PRAGMA table_info(entries)')}
+                if 'mood_version' not in columns:
+                    cursor.execute('ALTER TABLE entries ADD COLUMN mood_version INTEGER')
+                if 'content_hash' not in columns:
+                    cursor.execute('ALTER TABLE entries ADD COLUMN content_hash TEXT')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_entries_mood_version ON entries (mood_version, id)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_entries_timestamp ON entries (timestamp)')
                 conn.commit()
         except sqlite3.Error as e:
             logger.error(f"Failed to initialize database: {e}")
             raise
     
-    def save_entry(self, entry: str, mood: str) -> None:
+    def save_entry(self, entry: str, mood: str, mood_version: Optional[int] = None) -> None:
         """Save a journal entry to the database.
-        
+
         Args:
             entry: The journal entry text
             mood: The detected mood
+            mood_version: Version of the classifier that produced the mood.
+                Entries without a version are treated as stale.
             
         Raises:
             ValueError: If entry or mood is empty
@@ -46,7 +74,10 @@ class JournalDatabase:
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
-                cursor.execute('INSERT INTO entries (entry, mood) VALUES (?, ?)', (entry, mood))
+                cursor.execute(
+                    'INSERT INTO entries (entry, mood, mood_version, content_hash) VALUES (?, ?, ?, ?)',
+                    (entry, mood, mood_version, content_hash(entry))
+                )
                 conn.commit()
         except sqlite3.Error as e:
             logger.error(f"Failed to save entry: {e}")
@@ -67,11 +98,16 @@ class JournalDatabase:
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
-                cursor.execute('SELECT entry, mood, timestamp FROM entries ORDER BY timestamp DESC LIMIT ?', (limit,))
-                return cursor.fetchall()
+                cursor.execute('SELECT entry, mood, timestamp FROM entries ORDER BY timestamp DESC, id DESC LIMIT ?', (limit,))
+                entries = cursor.fetchall()
         except sqlite3.Error as e:
             logger.error(f"Failed to get recent entries: {e}")
             raise
+        
+        # Archived entries are all older than the hot ones
+        if self.archive and len(entries) < limit:
+            entries += self.archive.get_recent_entries(limit - len(entries))
+        return entries
     
     def get_entries_by_mood(self, mood: str, limit: int = 5) -> List[Tuple[str, str, str]]:
         """Get journal entries with a specific mood.
@@ -93,8 +129,120 @@ class JournalDatabase:
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
-                cursor.execute('SELECT entry, mood, timestamp FROM entries WHERE mood = ? ORDER BY timestamp DESC LIMIT ?', (mood, limit))
-                return cursor.fetchall()
+                cursor.execute('SELECT entry, mood, timestamp FROM entries WHERE mood = ? ORDER BY timestamp DESC, id DESC LIMIT ?', (mood, limit))
+                entries = cursor.fetchall()
         except sqlite3.Error as e:
             logger.error(f"Failed to get entries by mood: {e}")
-            raise 
\ No newline at end of file
+            raise
+        
+        if self.archive and len(entries) < limit:
+            entries += self.archive.get_recent_entries(limit - len(entries), mood=mood)
+        return entries
+    
+    def archive_entries(self, older_than_days: int, segment_rows: int = SEGMENT_MAX_ROWS) -> int:
+        """Move entries older than the given age into archive segments.
+        
+        Entries are moved in chunks of at most `segment_rows`, one segment
+        and one delete transaction per chunk, so a large backlog never has to
+        fit in memory at once. Each segment is written before its rows are
+        deleted from the hot database, and rows left behind by an interrupted
+        run are cleaned up first, so no entry is ever lost or duplicated. The
+        hot database is vacuumed afterwards to return the freed pages.
+        
+        Args:
+            older_than_days: Age in days after which entries are archived
+            segment_rows: Maximum number of entries per segment
+            
+        Returns:
+            Number of entries archived
+            
+        Raises:
+            ValueError: If the database has no archive directory
+            sqlite3.Error: If database operation fails
+        """
+        if not self.archive:
+            raise ValueError("No archive directory configured")
+        
+        archived = 0
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                # Finish a run that wrote its segment but didn't delete the rows.
+                # Ids alone aren't enough: SQLite may reuse the ids of deleted rows.
+                conn.executemany(
+                    'DELETE FROM entries WHERE id = ? AND timestamp = ? AND entry = ?',
+                    [(row["id"], row["timestamp"], row["entry"]) for row in self.archive.last_segment_rows()]
+                )
+                conn.commit()
+                
+                # Fix the cutoff once so every chunk of this run uses the same one
+                cutoff = conn.execute("SELECT datetime('now', ?)", (f"-{older_than_days} days",)).fetchone()[0]
+                conn.row_factory = sqlite3.Row
+                last_id = 0
+                while True:
+                    rows = conn.execute(
+                        'SELECT * FROM entries WHERE id > ? AND timestamp < ? ORDER BY id LIMIT ?',
+                        (last_id, cutoff, segment_rows)
+                    ).fetchall()
+                    if not rows:
+                        break
+                    
+                    self.archive.write_segment([dict(row) for row in rows])
+                    conn.executemany('DELETE FROM entries WHERE id = ?', [(row["id"],) for row in rows])
+                    conn.commit()
+                    archived += len(rows)
+                    last_id = rows[-1]["id"]
+            
+            if not archived:
+                return 0
+            
+            # VACUUM can't run inside a transaction
+            conn = sqlite3.connect(self.db_path, isolation_level=None)
+            try:
+                conn.execute('VACUUM')
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.error(f"Failed to archive entries: {e}")
+            raise
+        
+        logger.info(f"Archived {archived} entries older than {older_than_days} days")
+        return archived 
+    
+    def drop_archived_duplicates(self) -> int:
+        """Delete hot rows that are also stored in the archive.
+        
+        Restoring a backup taken before an archiving run brings back rows
+        that already live in segments. Rows are matched on id, timestamp and
+        text, since SQLite may reuse the ids of deleted rows.
+        
+        Returns:
+            Number of rows deleted
+            
+        Raises:
+            sqlite3.Error: If database operation fails
+        """
+        if not self.archive:
+            return 0
+        
+        removed = 0
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                min_id, max_id = conn.execute('SELECT MIN(id), MAX(id) FROM entries').fetchone()
+                if min_id is None:
+                    return 0
+                for segment in self.archive.load_manifest()["segments"]:
+                    if segment["max_id"] < min_id or segment["min_id"] > max_id:
+                        continue
+                    cursor = conn.executemany(
+                        'DELETE FROM entries WHERE id = ? AND timestamp = ? AND entry = ?',
+                        [(row["id"], row["timestamp"], row["entry"]) for row in self.archive.read_segment(segment)]
+                    )
+                    removed += cursor.rowcount
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Failed to drop archived duplicates: {e}")
+            raise
+        
+        if removed:
+            logger.info(f"Dropped {removed} hot entries already stored in the archive")
+        return removed
@@ -0,0 +1,172 @@
+"""Re-classify stored moods after infer_mood changes.
+
+Only stale rows are touched: rows whose mood_version differs from the current
+classifier version, or that have no content hash yet. Rows are streamed in id
+order, classified in worker processes and written back one batch per
+transaction, so an interrupted run simply resumes where it stopped.
+
+Archived entries are re-classified too: each archive segment holding stale
+rows is rewritten as a new segment and swapped into the manifest.
+
+Usage:
+    python -m src.data.mood_reclassifier [--batch-size N] [--workers N]
+"""
+import argparse
+import logging
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from src.config.config import load_config
+from src.config.logging_config import setup_logging
+from src.data.archive import ArchiveStore, row_mood_version
+from src.data.journal_db import JournalDatabase, content_hash
+from src.utils.mood_analyzer import infer_mood, MOOD_CLASSIFIER_VERSION
+
+logger = logging.getLogger(__name__)
+
+def _classify_texts(texts: List[str]) -> List[str]:
+    """Classify a chunk of entry texts; runs inside a worker process."""
+    return [infer_mood(text) for text in texts]
+
+def _classify_unique(texts_by_hash: Dict[str, str], pool: Optional[ProcessPoolExecutor],
+                     workers: int) -> Dict[str, str]:
+    """Classify each distinct text once and return {content hash: mood}."""
+    texts = list(texts_by_hash.values())
+    if pool:
+        size = max(1, -(-len(texts) // workers))
+        chunks = [texts[i:i + size] for i in range(0, len(texts), size)]
+        moods = [mood for chunk in pool.map(_classify_texts, chunks) for mood in chunk]
+    else:
+        moods = _classify_texts(texts)
+    return dict(zip(texts_by_hash.keys(), moods))
+
+def iter_stale_batches(conn: sqlite3.Connection, classifier_version: int,
+                       batch_size: int) -> Iterator[List[Tuple[int, str]]]:
+    """Yield batches of (id, entry) rows that need re-classification.
+
+    Uses keyset pagination on id so each batch is an index range scan rather
+    than an ever-growing OFFSET.
+    """
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            '''
+            SELECT id, entry FROM entries
+            WHERE id > ? AND (mood_version IS NULL OR mood_version != ? OR content_hash IS NULL)
+            ORDER BY id LIMIT ?
+            ''',
+            (last_id, classifier_version, batch_size)
+        ).fetchall()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+def reclassify_archive(archive: ArchiveStore, classifier_version: int,
+                       pool: Optional[ProcessPoolExecutor] = None, workers: int = 1) -> int:
+    """Re-classify stale rows in archive segments.
+
+    Segments whose manifest record shows only the current classifier version
+    are skipped without being opened; the others are rewritten.
+
+    Returns:
+        Number of archived entries re-classified
+    """
+    updated = 0
+    for segment in list(archive.load_manifest()["segments"]):
+        if segment.get("mood_versions") == [classifier_version]:
+            continue
+        rows = [dict(row) for row in archive.read_segment(segment)]
+        stale = [row for row in rows if row_mood_version(row) != classifier_version]
+        if not stale:
+            continue
+
+        unique: Dict[str, str] = {}
+        for row in stale:
+            row["content_hash"] = content_hash(row["entry"])
+            unique.setdefault(row["content_hash"], row["entry"])
+        mood_by_hash = _classify_unique(unique, pool, workers)
+        for row in stale:
+            row["mood"] = mood_by_hash[row["content_hash"]]
+            row["mood_version"] = classifier_version
+
+        archive.replace_segment(segment, rows)
+        updated += len(stale)
+        logger.info(f"Re-classified {len(stale)} archived entries in {segment['file']}")
+    return updated
+
+def reclassify_stale_entries(db_path: Path, batch_size: int = 1000, workers: Optional[int] = None,
+                             classifier_version: int = MOOD_CLASSIFIER_VERSION,
+                             archive_dir: Optional[Path] = None) -> int:
+    """Re-classify every stale entry in the database and its archive.
+
+    Args:
+        db_path: Path to the journal database
+        batch_size: Number of rows read, classified and written per transaction
+        workers: Number of worker processes; 1 classifies in this process
+        classifier_version: Version stamped on re-classified rows
+        archive_dir: Archive directory whose segments are re-classified too
+
+    Returns:
+        Number of entries re-classified
+
+    Raises:
+        sqlite3.Error: If database operation fails
+    """
+    # Make sure the versioning columns exist on older databases
+    JournalDatabase(db_path)
+
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    updated = 0
+    try:
+        with sqlite3.connect(db_path) as conn:
+            for rows in iter_stale_batches(conn, classifier_version, batch_size):
+                # Identical texts (e.g. repeated greetings) are classified once
+                hashes = [content_hash(entry) for _, entry in rows]
+                unique: Dict[str, str] = {}
+                for entry_hash, (_, entry) in zip(hashes, rows):
+                    unique.setdefault(entry_hash, entry)
+                mood_by_hash = _classify_unique(unique, pool, workers)
+
+                # Skip rows edited since they were read; the next run picks them up
+                cursor = conn.executemany(
+                    'UPDATE entries SET mood = ?, mood_version = ?, content_hash = ? WHERE id = ? AND entry = ?',
+                    [
+                        (mood_by_hash[entry_hash], classifier_version, entry_hash, entry_id, entry)
+                        for entry_hash, (entry_id, entry) in zip(hashes, rows)
+                    ]
+                )
+                conn.commit()
+                updated += cursor.rowcount
+                logger.info(f"Re-classified {updated} entries (up to id {rows[-1][0]})")
+
+        if archive_dir:
+            updated += reclassify_archive(ArchiveStore(archive_dir), classifier_version, pool, workers)
+    except sqlite3.Error as e:
+        logger.error(f"Failed to re-classify entries: {e}")
+        raise
+    finally:
+        if pool:
+            pool.shutdown()
+
+    return updated
+
+def main() -> None:
+    """Run the re-classification job against the configured database."""
+    parser = argparse.ArgumentParser(description="Re-classify stale journal moods")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    setup_logging()
+    config = load_config()
+    updated = reclassify_stale_entries(
+        config["db_path"], batch_size=args.batch_size, workers=args.workers, archive_dir=config["archive_dir"]
+    )
+    logger.info(f"Re-classification finished: {updated} entries updated to version {MOOD_CLASSIFIER_VERSION}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+class SharedCache:
+    """Key/value cache with expiry shared by every worker process.
+
+    Backed by a local SQLite file in WAL mode, so reads never block on
+    writers and all processes on the box see the same entries. Each thread
+    keeps its own connection.
+    """
+
+    def __init__(self, db_path: Path, prune_interval: float = 300.0):
+        """Initialize the cache stored at the given path.
+
+        Args:
+            db_path: Path to the cache database
+            prune_interval: Seconds between sweeps for expired entries, run
+                opportunistically from set
+        """
+        self.db_path = db_path
+        self.prune_interval = prune_interval
+        self._local = threading.local()
+        self._init_db()
+        self.prune()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection to the cache database."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self) -> None:
+        """Initialize the cache schema if it doesn't exist."""
+        try:
+            conn = self._connect()
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS cache (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS quotas (
+                    name TEXT PRIMARY KEY,
+                    window_start REAL NOT NULL,
+                    used INTEGER NOT NULL
+                )
+            ''')
+        except sqlite3.Error as e:
+            logger.error(f"Failed to initialize shared cache: {e}")
+            raise
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """Return the cached value, or None if it is missing or expired."""
+        try:
+            row = self._connect().execute(
+                'SELECT value FROM cache WHERE namespace = ? AND key = ? AND expires_at > ?',
+                (namespace, key, time.time())
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Shared cache read failed: {e}")
+            return None
+        return json.loads(row[0]) if row else None
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float) -> None:
+        """Store a JSON-serializable value for `ttl` seconds."""
+        if time.monotonic() >= self._next_prune:
+            try:
+                self.prune()
+            except sqlite3.Error as e:
+                logger.warning(f"Shared cache prune failed: {e}")
+        try:
+            self._connect().execute(
+                'INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)',
+                (namespace, key, json.dumps(value), time.time() + ttl)
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Shared cache write failed: {e}")
+
+    def prune(self) -> int:
+        """Delete expired entries and return how many were removed."""
+        self._next_prune = time.monotonic() + self.prune_interval
+        cursor = self._connect().execute('DELETE FROM cache WHERE expires_at <= ?', (time.time(),))
+        return cursor.rowcount
+
+    def consume_quota(self, name: str, amount: int, limit: int, window_seconds: float) -> bool:
+        """Atomically spend `amount` units of a quota shared across processes.
+
+        Args:
+            name: Quota name, e.g. "youtube"
+            amount: Units this call costs
+            limit: Units available per window
+            window_seconds: Length of the quota window
+
+        Returns:
+            True if the units were granted, False if the quota is exhausted
+        """
+        conn = self._connect()
+        now = time.time()
+        try:
+            # BEGIN IMMEDIATE takes the write lock up front so read-check-write is atomic
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT window_start, used FROM quotas WHERE name = ?', (name,)).fetchone()
+            window_start, used = row if row else (now, 0)
+            if now - window_start >= window_seconds:
+                window_start, used = now, 0
+            granted = used + amount <= limit
+            if granted:
+                used += amount
+            conn.execute(
+                'INSERT OR REPLACE INTO quotas (name, window_start, used) VALUES (?, ?, ?)',
+                (name, window_start, used)
+            )
+            conn.execute('COMMIT')
+            return granted
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            logger.warning(f"Quota check for {name} failed, allowing call: {e}")
+            return True
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import zlib
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Connections after which a single client address for all of them is reported
+SINGLE_CLIENT_WARN_AFTER = 100
+
+def forwarded_client(head: bytes) -> Optional[str]:
+    """Return the original client address from an HTTP request head.
+
+    Reverse proxies list the client first in X-Forwarded-For, so that entry
+    survives any number of proxy hops.
+
+    Args:
+        head: Raw request line and headers
+
+    Returns:
+        The first X-Forwarded-For address, or None if the header is absent
+    """
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"x-forwarded-for":
+            client = value.split(b",")[0].strip().decode("latin-1")
+            return client or None
+    return None
+
+class StickyBalancer:
+    """Local TCP load balancer that pins each client to one backend.
+
+    Gradio keeps session and queue state in the process that served the
+    page, so a client must keep talking to the same worker. Clients are
+    hashed by the first X-Forwarded-For address when a reverse proxy sets
+    it, else by their IP; if their backend is down the next one is tried.
+    """
+
+    def __init__(self, backends: List[Tuple[str, int]], connect_timeout: float = 5.0,
+                 head_timeout: float = 30.0):
+        """Initialize the balancer with (host, port) backends."""
+        self.backends = backends
+        self.connect_timeout = connect_timeout
+        self.head_timeout = head_timeout
+        self._first_client: Optional[str] = None
+        self._connections = 0
+
+    def backend_order(self, client_host: str) -> List[Tuple[str, int]]:
+        """Return the backends to try for a client, preferred one first."""
+        start = zlib.crc32(client_host.encode("utf-8")) % len(self.backends)
+        return self.backends[start:] + self.backends[:start]
+
+    async def _pipe(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Copy bytes from reader to writer until either side closes."""
+        try:
+            while True:
+                data = await reader.read(64 * 1024)
+                if not data:
+                    break
+                writer.write(data)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    def _track_client(self, client: str) -> None:
+        """Warn once if every connection so far came from the same address."""
+        if self._connections > SINGLE_CLIENT_WARN_AFTER:
+            return
+        if self._first_client is None:
+            self._first_client = client
+        elif client != self._first_client:
+            self._connections = SINGLE_CLIENT_WARN_AFTER + 1
+            return
+        self._connections += 1
+        if self._connections == SINGLE_CLIENT_WARN_AFTER and len(self.backends) > 1:
+            logger.warning(
+                f"All {SINGLE_CLIENT_WARN_AFTER} connections so far came from {client}, so they share one "
+                f"worker; a reverse proxy in front of the app should set X-Forwarded-For"
+            )
+
+    async def _read_head(self, client_reader: asyncio.StreamReader) -> bytes:
+        """Read the request head so it can be inspected, then forwarded.
+
+        The stream's buffer limit caps how much is read; heads that are larger,
+        incomplete or slow to arrive are left to the pipe and yield no address.
+        """
+        try:
+            return await asyncio.wait_for(client_reader.readuntil(b"\r\n\r\n"), self.head_timeout)
+        except asyncio.IncompleteReadError as e:
+            return e.partial
+        except (asyncio.LimitOverrunError, asyncio.TimeoutError):
+            return b""
+
+    async def handle_client(self, client_reader: asyncio.StreamReader, client_writer: asyncio.StreamWriter) -> None:
+        """Proxy one client connection to its backend."""
+        peer = client_writer.get_extra_info("peername") or ("unknown", 0)
+        head = await self._read_head(client_reader)
+        client = forwarded_client(head) or peer[0]
+        self._track_client(client)
+        for host, port in self.backend_order(client):
+            try:
+                backend_reader, backend_writer = await asyncio.wait_for(
+                    asyncio.open_connection(host, port), self.connect_timeout
+                )
+                break
+            except (OSError, asyncio.TimeoutError):
+                logger.warning(f"Backend {host}:{port} unavailable, trying the next one")
+        else:
+            logger.error(f"No backend available for {client}")
+            client_writer.close()
+            return
+
+        if head:
+            backend_writer.write(head)
+
+        await asyncio.gather(
+            self._pipe(client_reader, backend_writer),
+            self._pipe(backend_reader, client_writer)
+        )
+
+    async def serve(self, host: str, port: int) -> None:
+        """Accept client connections until cancelled."""
+        server = await asyncio.start_server(self.handle_client, host, port)
+        logger.info(f"Load balancer listening on {host}:{port} for {len(self.backends)} workers")
+        async with server:
+            await server.serve_forever()
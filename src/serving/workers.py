@@ -0,0 +1,62 @@
+import asyncio
+import logging
+import multiprocessing
+from typing import Callable, Dict
+from src.serving.balancer import StickyBalancer
+
+logger = logging.getLogger(__name__)
+
+def serve_workers(target: Callable[[int, int], None], workers: int, host: str, port: int,
+                  backend_port_start: int, check_interval: float = 5.0) -> None:
+    """Run `workers` app processes behind a local load balancer.
+
+    Each worker is started as target(worker_index, backend_port) in its own
+    process, so CPU-bound work scales across cores. Workers that exit are
+    restarted. Blocks until interrupted, then stops every worker.
+
+    Args:
+        target: Picklable function serving the app on the given port
+        workers: Number of worker processes
+        host: Address the load balancer listens on
+        port: Port the load balancer listens on
+        backend_port_start: Port of the first worker; others follow sequentially
+        check_interval: Seconds between worker health checks
+    """
+    # spawn gives each worker a clean interpreter instead of a fork of this one
+    context = multiprocessing.get_context("spawn")
+    backends = [("127.0.0.1", backend_port_start + i) for i in range(workers)]
+    processes: Dict[int, multiprocessing.Process] = {}
+
+    def start(worker_index: int) -> None:
+        process = context.Process(
+            target=target,
+            args=(worker_index, backends[worker_index][1]),
+            name=f"inner-mirror-worker-{worker_index}"
+        )
+        process.start()
+        processes[worker_index] = process
+        logger.info(f"Started worker {worker_index} (pid {process.pid}) on port {backends[worker_index][1]}")
+
+    async def supervise() -> None:
+        while True:
+            await asyncio.sleep(check_interval)
+            for worker_index, process in list(processes.items()):
+                if not process.is_alive():
+                    logger.warning(f"Worker {worker_index} exited with code {process.exitcode}, restarting")
+                    start(worker_index)
+
+    async def run() -> None:
+        balancer = StickyBalancer(backends)
+        await asyncio.gather(balancer.serve(host, port), supervise())
+
+    for worker_index in range(workers):
+        start(worker_index)
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        logger.info("Shutting down workers...")
+    finally:
+        for process in processes.values():
+            process.terminate()
+        for process in processes.values():
+            process.join(timeout=10)
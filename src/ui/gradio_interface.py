@@ -1,9 +1,20 @@
 import gradio as gr
 
 class JournalUI:
-    def __init__(self, chat_handler):
-        """Initialize the journal UI with the given chat handler function."""
+    def __init__(self, chat_handler, late_reply_handler=None, concurrency_limit=1):
+        """Initialize the journal UI with the given chat handler function.
+        
+        Args:
+            chat_handler: Handles a message, returning the cleared textbox, the
+                chat history and the ID of a turn whose reply is still pending
+            late_reply_handler: Optional async handler run after each turn to
+                append a late reply; it never counts against concurrency_limit
+            concurrency_limit: Turns handled at once across all sessions, or
+                None for no limit
+        """
         self.chat_handler = chat_handler
+        self.late_reply_handler = late_reply_handler
+        self.concurrency_limit = concurrency_limit
     
     def create_interface(self):
         """Create and return the Gradio interface."""
@@ -61,8 +72,14 @@ class JournalUI:
                     )
             
             state = gr.State([])
+            pending_turn = gr.State(None)
 
-            msg.submit(self.chat_handler, [msg, state], [msg, chatbot])
-            send_button.click(self.chat_handler, [msg, state], [msg, chatbot])
+            for trigger in (msg.submit, send_button.click):
+                event = trigger(
+                    self.chat_handler, [msg, state], [msg, chatbot, pending_turn],
+                    concurrency_limit=self.concurrency_limit
+                )
+                if self.late_reply_handler:
+                    event.then(self.late_reply_handler, [state, pending_turn], [chatbot], concurrency_limit=None)
             
             return demo 
\ No newline at end of file
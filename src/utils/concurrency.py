@@ -0,0 +1,20 @@
+"""Helpers for running a chat turn's work on thread pools."""
+import contextvars
+from concurrent.futures import Executor, Future
+from typing import Callable
+from src.utils.profiler import sample_worker_thread
+
+def submit_in_context(executor: Executor, fn: Callable, /, *args, **kwargs) -> Future:
+    """Submit work to an executor inside a copy of the caller's context.
+
+    Context variables such as the request ID don't cross into pool threads
+    on their own, so without this, logs from the worker can't be tied to
+    the turn that started it. If the turn is being profiled, the worker
+    thread is sampled while it runs the work.
+    """
+    context = contextvars.copy_context()
+    return executor.submit(context.run, _run_sampled, fn, *args, **kwargs)
+
+def _run_sampled(fn: Callable, /, *args, **kwargs):
+    with sample_worker_thread():
+        return fn(*args, **kwargs)
@@ -0,0 +1,63 @@
+import random
+
+# Local reflections keyed by the moods infer_mood emits, used when the model
+# can't answer within the latency budget or fails outright
+FALLBACK_TEMPLATES = {
+    'greeting': [
+        "It's good to hear from you. What's on your mind today?",
+        "Welcome back. How are you arriving in this moment?"
+    ],
+    'joy': [
+        "It sounds like something really lifted you today. What about it felt most meaningful?",
+        "There's a lightness in what you wrote. What would help you carry this feeling forward?"
+    ],
+    'positive': [
+        "It sounds like things are leaning in a good direction. What's been helping?",
+        "I can hear some warmth in this. What part of it would you like to remember?"
+    ],
+    'stress': [
+        "That sounds like a lot to hold at once. What feels most pressing right now?",
+        "It makes sense to feel stretched by this. What is one small thing that might ease the load?"
+    ],
+    'negative': [
+        "It sounds like today has been heavy. Would you like to say more about what's weighing on you?",
+        "Thank you for sharing this. What do you think you need most right now?"
+    ],
+    'sadness': [
+        "I'm sorry things feel hard right now. You don't have to carry this alone — what would feel comforting?",
+        "It takes courage to put sadness into words. What has been sitting with you the most?"
+    ],
+    'anger': [
+        "It sounds like something really crossed a line for you. What feels most unfair about it?",
+        "Anger often points to something we care about. What do you think it's protecting?"
+    ],
+    'surprise': [
+        "That sounds unexpected. How are you making sense of it so far?",
+        "Surprises can shake things up. What stood out to you most?"
+    ],
+    'gratitude': [
+        "It's lovely to notice what you're thankful for. What made this stand out today?",
+        "Gratitude can be grounding. How does it feel to put this into words?"
+    ],
+    'confusion': [
+        "It's okay not to have it figured out yet. What part feels most unclear?",
+        "Uncertainty can be uncomfortable. What would help you see this a little more clearly?"
+    ],
+    'curious': [
+        "I love that you're curious about this. What sparked the question?",
+        "That's an interesting thing to wonder about. Where do you think it might lead?"
+    ],
+    'reflection': [
+        "It sounds like you're turning this over carefully. What feels most true to you about it?",
+        "There's a lot of thought in this. What would you like to understand better?"
+    ],
+    'neutral': [
+        "Thanks for sharing that. How did the day feel for you overall?",
+        "I'm listening. Is there anything underneath this you'd like to explore?"
+    ]
+}
+
+def generate_local_reflection(user_entry, mood):
+    """Generate a quick mood-aware reflection without calling the model."""
+    templates = FALLBACK_TEMPLATES.get(mood, FALLBACK_TEMPLATES['neutral'])
+    return random.choice(templates)
@@ -0,0 +1,44 @@
+"""Single analysis pass over a chat message, shared by every pipeline stage."""
+
+# Phrases that make a video request take priority over the reflection
+DIRECT_VIDEO_PHRASES = ("video of", "video about", "video showing")
+
+# Words suggesting a stressed user would welcome a calming video
+HELP_KEYWORDS = ("help", "bad", "sad", "anxious", "worried")
+
+class ParsedMessage:
+    """A message normalized once per turn.
+
+    Attributes:
+        raw: The message as typed
+        lower: Lowercased message
+        normalized: Lowercased message without surrounding whitespace
+        tokens: Whitespace-separated lowercase tokens
+        word_count: Number of tokens
+        direct_video: Whether a direct video phrase appears
+        asks_for_help: Whether a help keyword appears
+    """
+
+    __slots__ = ("raw", "lower", "normalized", "tokens", "word_count", "direct_video", "asks_for_help")
+
+    def __init__(self, raw: str):
+        self.raw = raw
+        self.lower = raw.lower()
+        self.normalized = self.lower.strip()
+        self.tokens = self.lower.split()
+        self.word_count = len(self.tokens)
+        self.direct_video = self.contains_any(DIRECT_VIDEO_PHRASES)
+        self.asks_for_help = self.contains_any(HELP_KEYWORDS)
+
+    def contains_any(self, phrases) -> bool:
+        """Return True if any phrase occurs in the lowercased message."""
+        return any(phrase in self.lower for phrase in phrases)
+
+    def __repr__(self) -> str:
+        return f"ParsedMessage({self.raw!r})"
+
+def parse_message(message) -> ParsedMessage:
+    """Return the analysis for a message, reusing it if already parsed."""
+    if isinstance(message, ParsedMessage):
+        return message
+    return ParsedMessage(message)
@@ -1,59 +1,71 @@
 from textblob import TextBlob
 import re
+from src.utils.message_parser import parse_message
+
+# Bump whenever infer_mood's rules change (keywords, thresholds, special cases)
+# so stored moods are picked up by the re-classification job
+MOOD_CLASSIFIER_VERSION = 1
+
+GREETING_PATTERN = re.compile(r'^(hi|hello|hey|good morning|good afternoon|good evening|howdy|greetings|hi there|hello there)[\s\!\.\?]*$')
+
+# Common emotion words, checked in order before sentiment analysis
+EMOTION_KEYWORDS = {
+    'joy': ['happy', 'joy', 'excited', 'glad', 'delighted', 'pleased', 'thrilled', 'content'],
+    'stress': ['stressed', 'anxious', 'worried', 'nervous', 'tense', 'overwhelmed', 'afraid', 'scared'],
+    'sadness': ['sad', 'unhappy', 'depressed', 'down', 'blue', 'gloomy', 'miserable', 'upset'],
+    'anger': ['angry', 'mad', 'furious', 'annoyed', 'irritated', 'frustrated', 'enraged'],
+    'surprise': ['surprised', 'amazed', 'astonished', 'shocked', 'stunned'],
+    'gratitude': ['grateful', 'thankful', 'appreciative', 'blessed'],
+    'confusion': ['confused', 'puzzled', 'perplexed', 'unsure', 'uncertain'],
+    'curious': ['curious', 'interested', 'intrigued', 'wonder', 'wondering']
+}
+
+# Factual statements that should be neutral
+FACTUAL_PATTERNS = [
+    re.compile(r'^the\s+[a-z]+\s+is\s+[a-z]+'),  # "The X is Y"
+    re.compile(r'^it\s+is\s+[a-z]+'),  # "It is X"
+    re.compile(r'^today\s+is\s+[a-z]+'),  # "Today is X"
+]
 
 def infer_mood(user_entry):
-    """Infer the user's mood from their journal entry using sentiment analysis."""
+    """Infer the user's mood from their journal entry using sentiment analysis.
+
+    Accepts the raw text or a ParsedMessage, so the message is only
+    normalized once per turn.
+    """
+    message = parse_message(user_entry)
+    user_entry_lower = message.lower
+
     # Check for simple greetings
-    greeting_pattern = r'^(hi|hello|hey|good morning|good afternoon|good evening|howdy|greetings|hi there|hello there)[\s\!\.\?]*$'
-    if re.match(greeting_pattern, user_entry.lower().strip()):
+    if GREETING_PATTERN.match(message.normalized):
         return 'greeting'
-    
-    # Check for common emotion words first (this takes precedence over sentiment analysis)
-    emotion_keywords = {
-        'joy': ['happy', 'joy', 'excited', 'glad', 'delighted', 'pleased', 'thrilled', 'content'],
-        'stress': ['stressed', 'anxious', 'worried', 'nervous', 'tense', 'overwhelmed', 'afraid', 'scared'],
-        'sadness': ['sad', 'unhappy', 'depressed', 'down', 'blue', 'gloomy', 'miserable', 'upset'],
-        'anger': ['angry', 'mad', 'furious', 'annoyed', 'irritated', 'frustrated', 'enraged'],
-        'surprise': ['surprised', 'amazed', 'astonished', 'shocked', 'stunned'],
-        'gratitude': ['grateful', 'thankful', 'appreciative', 'blessed'],
-        'confusion': ['confused', 'puzzled', 'perplexed', 'unsure', 'uncertain'],
-        'curious': ['curious', 'interested', 'intrigued', 'wonder', 'wondering']
-    }
-    
+
     # Special case for "The sky is blue. The grass is green." - the word "blue" is triggering sadness
-    if "sky is blue" in user_entry.lower() and "grass is green" in user_entry.lower():
+    if "sky is blue" in user_entry_lower and "grass is green" in user_entry_lower:
         return 'neutral'
-    
-    # Check for emotion keywords in the text
-    user_entry_lower = user_entry.lower()
-    for emotion, keywords in emotion_keywords.items():
+
+    # Check for emotion keywords in the text (this takes precedence over sentiment analysis)
+    for emotion, keywords in EMOTION_KEYWORDS.items():
         for keyword in keywords:
             if keyword in user_entry_lower:
                 # Don't count "blue" as sadness when it's referring to color
                 if keyword == "blue" and ("sky" in user_entry_lower or "color" in user_entry_lower):
                     continue
                 return emotion
-    
-    # Check for factual statements that should be neutral
-    factual_patterns = [
-        r'^the\s+[a-z]+\s+is\s+[a-z]+',  # "The X is Y"
-        r'^it\s+is\s+[a-z]+',  # "It is X"
-        r'^today\s+is\s+[a-z]+',  # "Today is X"
-    ]
-    
-    for pattern in factual_patterns:
-        if re.match(pattern, user_entry_lower):
+
+    for pattern in FACTUAL_PATTERNS:
+        if pattern.match(user_entry_lower):
             return 'neutral'
-    
+
     # Perform sentiment analysis
-    blob = TextBlob(user_entry)
+    blob = TextBlob(message.raw)
     sentiment = blob.sentiment.polarity
     subjectivity = blob.sentiment.subjectivity
-    
+
     # Very short entries with no clear emotion are likely neutral or greetings
-    if len(user_entry.split()) < 5 and abs(sentiment) < 0.2:
+    if message.word_count < 5 and abs(sentiment) < 0.2:
         return 'neutral'
-    
+
     # If no specific emotion words, use sentiment analysis
     if sentiment > 0.3:
         return 'joy'
@@ -67,4 +79,4 @@ def infer_mood(user_entry):
     elif subjectivity > 0.5:  # Lowered from 0.6 to catch more reflective content
         return 'reflection'
     else:
-        return 'neutral' 
\ No newline at end of file
+        return 'neutral'
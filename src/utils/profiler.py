@@ -0,0 +1,198 @@
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Path fragments used to attribute samples to a coarse category
+PROFILE_CATEGORIES = {
+    "textblob": ["textblob", "nltk"],
+    "regex": [f"{os.sep}re{os.sep}", "sre_"],
+    "network": ["httpx", "httpcore", "httplib2", "urllib3", "ssl.py", "socket.py", "googleapiclient", "openai"],
+    "database": ["sqlite3"]
+}
+
+# Profiler sampling the current turn. submit_in_context copies it into pool
+# threads, so work the turn hands off is sampled too.
+_active_profiler: ContextVar[Optional["ChatProfiler"]] = ContextVar("active_profiler", default=None)
+
+@contextmanager
+def sample_worker_thread() -> Iterator[None]:
+    """Sample the current thread while it does work for a profiled turn."""
+    profiler = _active_profiler.get()
+    if profiler is None:
+        yield
+        return
+    thread_id = threading.get_ident()
+    profiler._add_thread(thread_id)
+    try:
+        yield
+    finally:
+        profiler._remove_thread(thread_id)
+
+class ChatProfiler:
+    """Low-overhead sampling profiler for a fraction of chat turns.
+
+    A background thread periodically samples the stacks of the threads
+    currently handling a profiled turn, including pool threads running the
+    turn's model and tool calls. Stacks are aggregated across turns and
+    periodically dumped as collapsed stacks (flamegraph.pl / speedscope input)
+    plus a top-N summary of hot functions.
+    """
+
+    def __init__(self, sample_rate: float = 0.0, interval: float = 0.005,
+                 output_dir: Path = Path("logs") / "profiles", dump_every: int = 50, top_n: int = 20):
+        """Initialize the profiler.
+
+        Args:
+            sample_rate: Fraction of turns to profile; 0 disables profiling
+            interval: Seconds between stack samples
+            output_dir: Directory where profiles are written
+            dump_every: Write a profile after this many profiled turns
+            top_n: Number of hot functions listed in each summary
+        """
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.output_dir = output_dir
+        self.dump_every = dump_every
+        self.top_n = top_n
+        self._stacks: Counter = Counter()
+        self._active = set()
+        self._profiled_turns = 0
+        self._lock = threading.Lock()
+        self._has_work = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def set_sample_rate(self, sample_rate: float) -> None:
+        """Change the fraction of turns profiled, e.g. from an admin toggle."""
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        logger.info(f"Chat profiling sample rate set to {self.sample_rate}")
+
+    @contextmanager
+    def profile(self) -> Iterator[bool]:
+        """Profile the enclosed block if this turn is sampled.
+
+        Yields whether the turn is being profiled.
+        """
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            yield False
+            return
+
+        thread_id = threading.get_ident()
+        token = _active_profiler.set(self)
+        self._add_thread(thread_id)
+        try:
+            yield True
+        finally:
+            _active_profiler.reset(token)
+            self._remove_thread(thread_id)
+            with self._lock:
+                self._profiled_turns += 1
+                should_dump = self._profiled_turns % self.dump_every == 0
+            if should_dump:
+                self.dump()
+
+    def _add_thread(self, thread_id: int) -> None:
+        """Start sampling a thread."""
+        with self._lock:
+            self._active.add(thread_id)
+            self._ensure_sampler()
+            self._has_work.set()
+
+    def _remove_thread(self, thread_id: int) -> None:
+        """Stop sampling a thread."""
+        with self._lock:
+            self._active.discard(thread_id)
+            if not self._active:
+                self._has_work.clear()
+
+    def _ensure_sampler(self) -> None:
+        """Start the sampler thread on first use."""
+        if self._sampler is None or not self._sampler.is_alive():
+            self._sampler = threading.Thread(target=self._sample_loop, name="chat-profiler", daemon=True)
+            self._sampler.start()
+
+    def _sample_loop(self) -> None:
+        """Sample the stacks of active threads until the process exits."""
+        while True:
+            self._has_work.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id in self._active:
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        self._stacks[_collapse_stack(frame)] += 1
+
+    def get_stacks(self) -> Dict[str, int]:
+        """Return a copy of the aggregated collapsed stacks."""
+        with self._lock:
+            return dict(self._stacks)
+
+    def hot_functions(self) -> List[Tuple[str, int, int]]:
+        """Return the top-N functions as (function, self samples, total samples)."""
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for stack, count in self.get_stacks().items():
+            frames = stack.split(";")
+            self_counts[frames[-1]] += count
+            for frame in set(frames):
+                total_counts[frame] += count
+        return [(name, self_counts[name], total_counts[name]) for name, _ in total_counts.most_common(self.top_n)]
+
+    def category_breakdown(self) -> Dict[str, int]:
+        """Return samples spent inside each PROFILE_CATEGORIES entry."""
+        breakdown = Counter()
+        for stack, count in self.get_stacks().items():
+            for category, fragments in PROFILE_CATEGORIES.items():
+                if any(fragment in stack for fragment in fragments):
+                    breakdown[category] += count
+        return dict(breakdown)
+
+    def dump(self) -> Optional[Path]:
+        """Write the aggregated stacks and a hot-function summary to disk.
+
+        Returns:
+            Path to the collapsed-stack file, or None if nothing was sampled
+        """
+        stacks = self.get_stacks()
+        if not stacks:
+            return None
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        # The pid keeps profiles from different worker processes apart
+        stamp = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        collapsed_path = self.output_dir / f"chat-{stamp}.collapsed"
+        with open(collapsed_path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+        total = sum(stacks.values())
+        lines = [f"{total} samples over {self._profiled_turns} profiled turns", "", "Categories:"]
+        for category, count in sorted(self.category_breakdown().items(), key=lambda item: -item[1]):
+            lines.append(f"  {category:<10} {count / total:6.1%}")
+        lines += ["", f"Top {self.top_n} functions (self% / total%):"]
+        for name, self_count, total_count in self.hot_functions():
+            lines.append(f"  {self_count / total:6.1%} {total_count / total:6.1%}  {name}")
+        summary = "\n".join(lines)
+        (self.output_dir / f"chat-{stamp}.top.txt").write_text(summary + "\n", encoding="utf-8")
+
+        logger.info(f"Wrote chat profile to {collapsed_path}\n{summary}")
+        return collapsed_path
+
+def _collapse_stack(frame) -> str:
+    """Render a frame's stack root-first as 'func (file:line);...'."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
@@ -1,3 +1,9 @@
+def _video_label(video):
+    """Return the quoted video title, with its duration when known."""
+    if video.get("duration"):
+        return f"'{video['title']}' ({video['duration']})"
+    return f"'{video['title']}'"
+
 def format_tool_response(tool_result, tool_name):
     """Format the response from a tool call."""
     if not tool_result.get("success", False):
@@ -8,13 +14,17 @@ def format_tool_response(tool_result, tool_name):
         return f"I used the {tool_name} tool, but didn't find any results."
     
     if tool_name == "search_video":
-        return f"I found a video that might interest you: '{results[0]['title']}'\n{results[0]['url']}"
+        return f"I found a video that might interest you: {_video_label(results[0])}\n{results[0]['url']}"
     elif tool_name == "get_trending_videos":
         response = "Here are some trending videos you might enjoy:\n"
         for i, video in enumerate(results, 1):
-            response += f"{i}. '{video['title']}'\n{video['url']}\n"
+            response += f"{i}. {_video_label(video)}\n{video['url']}\n"
         return response
     elif tool_name == "get_mood_based_recommendation":
-        return f"Based on your mood, you might enjoy this video: '{results[0]['title']}'\n{results[0]['url']}"
+        return f"Based on your mood, you might enjoy this video: {_video_label(results[0])}\n{results[0]['url']}"
     else:
-        return f"Here are the results from the {tool_name} tool:\n" + "\n".join([f"- {result}" for result in results]) 
\ No newline at end of file
+        return f"Here are the results from the {tool_name} tool:\n" + "\n".join([f"- {result}" for result in results]) 
+
+def format_tool_responses(tool_results):
+    """Format and merge the responses from several tool calls."""
+    return "\n\n".join(format_tool_response(result, tool_name) for tool_name, result in tool_results)
@@ -0,0 +1,114 @@
+import sqlite3
+import pytest
+from src.data.journal_db import JournalDatabase
+from src.data.backup import (
+    backup_database, verify_backup, list_backups, prune_backups, restore_backup, BackupService
+)
+
+@pytest.fixture
+def journal(tmp_path):
+    """Create a journal database with some entries."""
+    db = JournalDatabase(tmp_path / "journal.db")
+    for i in range(200):
+        db.save_entry(f"Entry {i} " + "x" * 500, "neutral")
+    return db
+
+def count_entries(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+def test_backup_is_complete_and_verified(journal, tmp_path):
+    """Test that a stepped backup copies every entry and passes verification."""
+    backup_path = backup_database(journal.db_path, tmp_path / "backups", pages_per_step=4, step_pause=0)
+    assert verify_backup(backup_path)
+    assert count_entries(backup_path) == 200
+    assert list_backups(tmp_path / "backups") == [backup_path]
+    assert not list((tmp_path / "backups").glob("*.partial"))
+
+def test_backup_while_writing(journal, tmp_path, monkeypatch):
+    """Test that writes between backup steps don't block or corrupt the backup."""
+    writes = []
+    
+    def write_during_pause(seconds):
+        journal.save_entry(f"Concurrent entry {len(writes)}", "joy")
+        writes.append(seconds)
+    
+    # Each pause between steps becomes a write from another connection
+    monkeypatch.setattr("src.data.backup.time.sleep", write_during_pause)
+    backup_path = backup_database(journal.db_path, tmp_path / "backups", pages_per_step=4, max_restarts=2)
+    monkeypatch.undo()
+    
+    assert writes
+    assert verify_backup(backup_path)
+    assert count_entries(backup_path) >= 200
+
+def test_prune_keeps_newest(journal, tmp_path):
+    """Test that retention keeps only the newest backups."""
+    service = BackupService(journal.db_path, tmp_path / "backups", interval_seconds=3600, retention=2)
+    paths = [service.run_once() for _ in range(3)]
+    assert list_backups(tmp_path / "backups") == paths[1:]
+    assert prune_backups(tmp_path / "backups", 1) == [paths[1]]
+
+def test_restore_backup(journal, tmp_path):
+    """Test restoring the database from a backup."""
+    backup_path = backup_database(journal.db_path, tmp_path / "backups")
+    journal.save_entry("Written after the backup", "joy")
+    assert count_entries(journal.db_path) == 201
+    
+    restore_backup(backup_path, journal.db_path)
+    assert count_entries(journal.db_path) == 200
+
+def test_corrupt_backup_is_rejected(tmp_path):
+    """Test that corrupt backups fail verification and can't be restored."""
+    corrupt = tmp_path / "journal-corrupt.db"
+    corrupt.write_bytes(b"not a database" * 100)
+    assert not verify_backup(corrupt)
+    with pytest.raises(sqlite3.DatabaseError):
+        restore_backup(corrupt, tmp_path / "journal.db")
+
+@pytest.fixture
+def tiered_journal(tmp_path):
+    """Create a journal whose oldest entries are in the archive."""
+    db = JournalDatabase(tmp_path / "journal.db", archive_dir=tmp_path / "archive")
+    with sqlite3.connect(db.db_path) as conn:
+        conn.executemany(
+            'INSERT INTO entries (entry, mood, timestamp) VALUES (?, ?, ?)',
+            [(f"Old entry {i}", "happy", f"2020-01-0{i + 1} 10:00:00") for i in range(3)]
+        )
+    db.save_entry("Recent entry", "joy")
+    return db
+
+def test_backup_includes_archive(tiered_journal, tmp_path):
+    """Test that archived entries are backed up and pruned with the database copy."""
+    tiered_journal.archive_entries(older_than_days=30)
+    archive_dir = tiered_journal.archive.archive_dir
+    first = backup_database(tiered_journal.db_path, tmp_path / "backups", archive_dir=archive_dir)
+    assert verify_backup(first)
+    assert len(list(first.with_suffix(".archive").glob("segment-*.jsonl.gz"))) == 1
+    
+    second = backup_database(tiered_journal.db_path, tmp_path / "backups", archive_dir=archive_dir)
+    prune_backups(tmp_path / "backups", 1)
+    assert not first.with_suffix(".archive").exists()
+    assert second.with_suffix(".archive").exists()
+
+def test_restore_before_archiving_has_no_duplicates(tiered_journal, tmp_path):
+    """Test that restoring a pre-archiving backup doesn't return archived entries twice."""
+    backup_path = backup_database(tiered_journal.db_path, tmp_path / "backups")
+    tiered_journal.archive_entries(older_than_days=30)
+    
+    restore_backup(backup_path, tiered_journal.db_path, tiered_journal.archive.archive_dir)
+    assert count_entries(tiered_journal.db_path) == 1
+    entries = [entry[0] for entry in tiered_journal.get_recent_entries(limit=10)]
+    assert entries == ["Recent entry", "Old entry 2", "Old entry 1", "Old entry 0"]
+
+def test_restore_rolls_archive_back_to_snapshot(tiered_journal, tmp_path):
+    """Test that restoring a backup brings the archive back to the same point."""
+    archive_dir = tiered_journal.archive.archive_dir
+    backup_path = backup_database(tiered_journal.db_path, tmp_path / "backups", archive_dir=archive_dir)
+    tiered_journal.archive_entries(older_than_days=30)
+    tiered_journal.save_entry("Written after the backup", "joy")
+    
+    restore_backup(backup_path, tiered_journal.db_path, archive_dir)
+    assert count_entries(tiered_journal.db_path) == 4
+    assert tiered_journal.archive.load_manifest()["segments"] == []
+    assert not list(archive_dir.glob("segment-*.jsonl.gz"))
@@ -3,6 +3,7 @@ from pathlib import Path
 import tempfile
 import sqlite3
 from src.data.journal_db import JournalDatabase
+from src.data.archive import ArchiveStore, SegmentCache
 
 @pytest.fixture
 def temp_db():
@@ -108,4 +109,80 @@ def test_get_entries_by_mood(temp_db):
     
     # Test getting non-existent mood
     empty_entries = db.get_entries_by_mood("nonexistent")
-    assert len(empty_entries) == 0 
\ No newline at end of file
+    assert len(empty_entries) == 0 
+
+@pytest.fixture
+def archived_db(tmp_path):
+    """Create a database with old entries moved into the archive."""
+    db = JournalDatabase(tmp_path / "journal.db", archive_dir=tmp_path / "archive")
+    
+    old_entries = [
+        ("Old happy entry", "happy", "2020-01-01 10:00:00"),
+        ("Old sad entry", "sad", "2020-01-02 10:00:00"),
+        ("Old happy entry 2", "happy", "2020-01-03 10:00:00")
+    ]
+    with sqlite3.connect(db.db_path) as conn:
+        conn.executemany('INSERT INTO entries (entry, mood, timestamp) VALUES (?, ?, ?)', old_entries)
+    db.save_entry("New happy entry", "happy")
+    db.save_entry("New calm entry", "calm")
+    
+    assert db.archive_entries(older_than_days=30) == 3
+    return db
+
+def test_archive_entries_moves_old_rows(archived_db):
+    """Test that archived entries leave the hot database."""
+    with sqlite3.connect(archived_db.db_path) as conn:
+        hot = [row[0] for row in conn.execute('SELECT entry FROM entries ORDER BY id')]
+    assert hot == ["New happy entry", "New calm entry"]
+    
+    manifest = archived_db.archive.load_manifest()
+    assert len(manifest["segments"]) == 1
+    assert manifest["segments"][0]["moods"] == {"happy": 2, "sad": 1}
+    
+    # Nothing left to archive
+    assert archived_db.archive_entries(older_than_days=30) == 0
+
+def test_reads_reach_archived_entries(archived_db):
+    """Test that read APIs transparently fall through to the archive."""
+    recent = archived_db.get_recent_entries(limit=4)
+    assert [entry[0] for entry in recent] == [
+        "New calm entry", "New happy entry", "Old happy entry 2", "Old sad entry"
+    ]
+    
+    happy = archived_db.get_entries_by_mood("happy")
+    assert [entry[0] for entry in happy] == ["New happy entry", "Old happy entry 2", "Old happy entry"]
+    assert archived_db.get_entries_by_mood("sad")[0][2] == "2020-01-02 10:00:00"
+
+def test_archive_cleans_up_interrupted_run(archived_db):
+    """Test that rows already in the newest segment are removed on the next run."""
+    with sqlite3.connect(archived_db.db_path) as conn:
+        conn.execute("INSERT INTO entries (id, entry, mood, timestamp) VALUES (1, 'Old happy entry', 'happy', '2020-01-01 10:00:00')")
+    
+    assert archived_db.archive_entries(older_than_days=30) == 0
+    assert len(archived_db.get_entries_by_mood("happy", limit=10)) == 3
+
+def test_archive_writes_bounded_segments(tmp_path):
+    """Test that a large backlog is archived in several bounded segments."""
+    db = JournalDatabase(tmp_path / "journal.db", archive_dir=tmp_path / "archive")
+    with sqlite3.connect(db.db_path) as conn:
+        conn.executemany(
+            'INSERT INTO entries (entry, mood, timestamp) VALUES (?, ?, ?)',
+            [(f"Old entry {i}", "happy", f"2020-01-01 10:00:{i:02d}") for i in range(7)]
+        )
+    
+    assert db.archive_entries(older_than_days=30, segment_rows=3) == 7
+    assert [segment["count"] for segment in db.archive.load_manifest()["segments"]] == [3, 3, 1]
+    assert [entry[0] for entry in db.get_recent_entries(limit=2)] == ["Old entry 6", "Old entry 5"]
+
+def test_segment_cache_is_bounded_by_size(tmp_path):
+    """Test that the segment cache evicts the oldest segments past its size limit."""
+    store = ArchiveStore(tmp_path / "archive")
+    rows = [{"id": i, "entry": "x" * 100, "mood": "happy", "timestamp": "2020-01-01"} for i in range(1, 4)]
+    first = store.write_segment(rows)
+    second = store.write_segment(rows)
+    
+    cache = SegmentCache(max_bytes=800)
+    assert len(cache.get(str(store.archive_dir / first["file"]))) == 3
+    cache.get(str(store.archive_dir / second["file"]))
+    assert [key[0] for key in cache._segments] == [str(store.archive_dir / second["file"])]
+    assert cache._size <= 800
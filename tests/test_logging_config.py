@@ -0,0 +1,105 @@
+import json
+import logging
+import time
+import pytest
+from logging.handlers import QueueHandler
+from src.config.logging_config import (
+    setup_logging, shutdown_logging, new_request_id, get_request_id, stage_timer, RateLimitFilter
+)
+
+@pytest.fixture
+def log_dir(tmp_path):
+    """Set up logging into a temporary directory and tear it down afterwards."""
+    setup_logging(tmp_path)
+    yield tmp_path
+    shutdown_logging()
+
+def read_records(log_dir):
+    """Flush the pipeline and return the JSON records written to the log file."""
+    shutdown_logging()
+    lines = (log_dir / "app.log").read_text().splitlines()
+    return [json.loads(line) for line in lines]
+
+def test_setup_twice_does_not_duplicate_handlers(log_dir):
+    """Test that repeated setup keeps a single queue handler."""
+    setup_logging(log_dir)
+    queue_handlers = [h for h in logging.getLogger().handlers if isinstance(h, QueueHandler)]
+    assert len(queue_handlers) == 1
+
+def test_records_are_json_with_request_id(log_dir):
+    """Test that records carry the request ID and stage timings."""
+    request_id = new_request_id()
+    with stage_timer("mood"):
+        pass
+    logging.getLogger("test").info("hello", extra={"user_turn": 3})
+    
+    records = read_records(log_dir)
+    stage = next(r for r in records if r.get("stage") == "mood")
+    assert stage["request_id"] == request_id
+    assert stage["duration_ms"] >= 0
+    
+    hello = next(r for r in records if r["message"] == "hello")
+    assert hello["request_id"] == request_id
+    assert hello["user_turn"] == 3
+
+def test_records_keep_tracebacks_apart(log_dir):
+    """Test that exceptions reach the JSON record in their own field."""
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logging.getLogger("test").error("failed %s", "here", exc_info=True)
+    
+    failed = next(r for r in read_records(log_dir) if r["logger"] == "test")
+    assert failed["message"] == "failed here"
+    assert "ValueError: boom" in failed["exc_info"]
+
+def test_rate_limit_filter_caps_bursts():
+    """Test that repeated info records are capped but warnings pass."""
+    limiter = RateLimitFilter(burst=3, interval=60)
+    record = logging.LogRecord("test", logging.INFO, "", 0, "tick %d", (1,), None)
+    assert [limiter.filter(record) for _ in range(5)] == [True, True, True, False, False]
+    
+    warning = logging.LogRecord("test", logging.WARNING, "", 0, "tick %d", (1,), None)
+    assert limiter.filter(warning)
+
+def test_rate_limit_filter_samples():
+    """Test that records with a zero sample rate are dropped."""
+    limiter = RateLimitFilter()
+    record = logging.LogRecord("test", logging.INFO, "", 0, "sampled", None, None)
+    record.sample_rate = 0.0
+    assert not limiter.filter(record)
+
+def test_rate_limit_filter_groups_fstrings_by_call_site():
+    """Test that differently formatted messages from one call site share a limit."""
+    limiter = RateLimitFilter(burst=3, interval=60)
+    records = [
+        logging.LogRecord("test", logging.INFO, "app.py", 10, f"took {i}ms", None, None)
+        for i in range(5)
+    ]
+    assert [limiter.filter(record) for record in records] == [True, True, True, False, False]
+    
+    other_line = logging.LogRecord("test", logging.INFO, "app.py", 11, "took 1ms", None, None)
+    assert limiter.filter(other_line)
+
+def test_rate_limit_filter_evicts_expired_windows():
+    """Test that windows are dropped once they expire."""
+    limiter = RateLimitFilter(burst=3, interval=0.01)
+    for line in range(100):
+        limiter.filter(logging.LogRecord("test", logging.INFO, "app.py", line, "tick", None, None))
+    time.sleep(0.02)
+    limiter.filter(logging.LogRecord("test", logging.INFO, "app.py", 0, "tick", None, None))
+    assert len(limiter._windows) == 1
+
+def test_request_id_follows_work_into_pools():
+    """Test that reflection and tool workers see the turn's request ID."""
+    from src.api.reflection_budget import BudgetedReflector
+    from src.api.youtube_client import YouTubeToolHandler
+    
+    request_id = new_request_id()
+    reflector = BudgetedReflector(lambda entry, mood: get_request_id(), budget=1.0)
+    assert reflector.reflect("entry", "neutral")[0] == request_id
+    
+    handler = YouTubeToolHandler("test-key")
+    handler.register_tool("whoami", lambda: {"success": True, "request_id": get_request_id()})
+    results = handler.handle_tool_calls([{"tool": "whoami"}], enrich=False)
+    assert results[0][1]["request_id"] == request_id
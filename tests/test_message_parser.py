@@ -0,0 +1,36 @@
+import pytest
+from src.utils.message_parser import ParsedMessage, parse_message
+from src.utils.mood_analyzer import infer_mood
+from src.api.youtube_client import detect_video_request, extract_tool_request
+
+def test_parsed_message_fields():
+    """Test that the message is normalized once with keyword hits."""
+    parsed = parse_message("  Can you HELP me find a Video of the sea?  ")
+    assert parsed.normalized == "can you help me find a video of the sea?"
+    assert parsed.tokens[:3] == ["can", "you", "help"]
+    assert parsed.word_count == 10
+    assert parsed.direct_video
+    assert parsed.asks_for_help
+
+def test_parsed_message_uses_slots():
+    """Test that no per-instance __dict__ is allocated."""
+    parsed = ParsedMessage("hello")
+    assert not hasattr(parsed, "__dict__")
+    with pytest.raises(AttributeError):
+        parsed.extra = 1
+
+def test_parse_message_reuses_analysis():
+    """Test that already parsed messages are passed through."""
+    parsed = parse_message("I'm so grateful")
+    assert parse_message(parsed) is parsed
+
+def test_stages_accept_parsed_messages():
+    """Test that mood and intent detection give the same results for both inputs."""
+    for text in ["Hi there!", "Find me a video about Mindfulness", "I'm so angry about work"]:
+        parsed = parse_message(text)
+        assert infer_mood(parsed) == infer_mood(text)
+        assert detect_video_request(parsed) == detect_video_request(text)
+        assert extract_tool_request(parsed) == extract_tool_request(text)
+    
+    # The query keeps the user's original casing
+    assert extract_tool_request(parse_message("Find me a video about Mindfulness"))["query"] == "Mindfulness"
@@ -0,0 +1,73 @@
+import json
+import pytest
+from src.api.model_router import ModelRouter, load_routing_policy, DEFAULT_ROUTING_POLICY
+
+def test_short_low_stakes_entry_uses_light_route():
+    """Test that short, positive entries are served by the fast model."""
+    router = ModelRouter()
+    route = router.select_route("Had a good lunch today", "joy")
+    assert route["name"] == "light"
+
+def test_long_entry_skips_light_route():
+    """Test that longer entries move to a bigger model."""
+    router = ModelRouter()
+    entry = " ".join(["word"] * 80)
+    assert router.select_route(entry, "reflection")["name"] == "standard"
+    
+    entry = " ".join(["word"] * 300)
+    assert router.select_route(entry, "joy")["name"] == "deep"
+
+def test_heavy_mood_uses_strongest_model():
+    """Test that distressed entries always get the strongest model."""
+    router = ModelRouter()
+    for mood in ["stress", "sadness", "anger", "negative"]:
+        assert router.select_route("I feel awful", mood)["name"] == "deep"
+
+def test_falls_back_to_last_route():
+    """Test that an entry matching no route uses the last route."""
+    policy = [
+        {"name": "only-joy", "model": "small", "max_tokens": 10, "moods": ["joy"]},
+        {"name": "short", "model": "medium", "max_tokens": 10, "max_words": 2, "moods": ["joy"]}
+    ]
+    router = ModelRouter(policy)
+    assert router.select_route("a b c", "sadness")["name"] == "short"
+
+def test_route_stats():
+    """Test that latency, token and cost stats are aggregated per route."""
+    router = ModelRouter()
+    light = router.select_route("hi", "neutral")
+    router.record(light, 0.2, total_tokens=1000)
+    router.record(light, 0.4, total_tokens=1000, error=True)
+    
+    stats = router.get_stats()["light"]
+    assert stats["calls"] == 2
+    assert stats["errors"] == 1
+    assert stats["total_tokens"] == 2000
+    assert stats["avg_latency"] == pytest.approx(0.3)
+    assert stats["total_cost"] == pytest.approx(2 * light["cost_per_1k_tokens"])
+
+def test_load_routing_policy(tmp_path):
+    """Test loading a routing policy from a JSON file."""
+    assert load_routing_policy(None) == DEFAULT_ROUTING_POLICY
+    
+    policy_file = tmp_path / "policy.json"
+    policy_file.write_text(json.dumps([{"name": "all", "model": "gpt-4", "max_tokens": 500}]))
+    assert load_routing_policy(policy_file)[0]["model"] == "gpt-4"
+    
+    policy_file.write_text(json.dumps([{"model": "gpt-4"}]))
+    with pytest.raises(ValueError):
+        load_routing_policy(policy_file)
+    
+    policy_file.write_text(json.dumps([{"name": "all", "model": "gpt-4"}]))
+    with pytest.raises(ValueError, match="max_tokens"):
+        load_routing_policy(policy_file)
+
+def test_log_stats_reports_used_routes(caplog):
+    """Test that route stats are logged for routes that served calls."""
+    router = ModelRouter()
+    router.record(router.select_route("hi", "neutral"), 0.5, total_tokens=100)
+    with caplog.at_level("INFO", logger="src.api.model_router"):
+        router.log_stats()
+    messages = [record.getMessage() for record in caplog.records]
+    assert len(messages) == 1
+    assert messages[0].startswith("Route 'light': 1 calls")
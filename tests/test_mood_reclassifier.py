@@ -0,0 +1,98 @@
+import sqlite3
+import pytest
+from src.data import mood_reclassifier
+from src.data.journal_db import JournalDatabase, content_hash
+from src.data.mood_reclassifier import reclassify_stale_entries
+from src.utils.mood_analyzer import MOOD_CLASSIFIER_VERSION
+
+@pytest.fixture
+def temp_db(tmp_path):
+    """Create a database with a mix of stale and current entries."""
+    db_path = tmp_path / "journal.db"
+    db = JournalDatabase(db_path)
+    db.save_entry("I'm feeling really happy today!", "neutral")
+    db.save_entry("I'm so angry about what happened at work today!", "joy", mood_version=0)
+    db.save_entry("I'm so grateful for all the support.", "gratitude", mood_version=MOOD_CLASSIFIER_VERSION)
+    db.save_entry("I'm feeling really happy today!", "sadness")
+    return db_path
+
+def read_rows(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute('SELECT entry, mood, mood_version, content_hash FROM entries ORDER BY id').fetchall()
+
+def test_reclassifies_only_stale_entries(temp_db):
+    """Test that stale rows are re-classified and current rows are left alone."""
+    updated = reclassify_stale_entries(temp_db, batch_size=2, workers=1)
+    assert updated == 3
+    
+    rows = read_rows(temp_db)
+    assert [row[1] for row in rows] == ["joy", "anger", "gratitude", "joy"]
+    assert all(row[2] == MOOD_CLASSIFIER_VERSION for row in rows)
+    assert all(row[3] == content_hash(row[0]) for row in rows)
+    
+    # A second run finds nothing left to do
+    assert reclassify_stale_entries(temp_db, workers=1) == 0
+
+def test_reclassifies_with_worker_processes(temp_db):
+    """Test that classification in worker processes gives the same result."""
+    assert reclassify_stale_entries(temp_db, workers=2) == 3
+    assert [row[1] for row in read_rows(temp_db)] == ["joy", "anger", "gratitude", "joy"]
+
+def test_skips_entries_edited_during_classification(temp_db, monkeypatch):
+    """Test that a row edited after it was read keeps its new text and stays stale."""
+    classify = mood_reclassifier._classify_unique
+    
+    def classify_then_edit(unique, pool, workers):
+        with sqlite3.connect(temp_db) as conn:
+            conn.execute("UPDATE entries SET entry = 'Hi there!' WHERE id = 1")
+        return classify(unique, pool, workers)
+    
+    monkeypatch.setattr(mood_reclassifier, "_classify_unique", classify_then_edit)
+    assert reclassify_stale_entries(temp_db, batch_size=10, workers=1) == 2
+    assert read_rows(temp_db)[0][:2] == ("Hi there!", "neutral")
+    
+    monkeypatch.setattr(mood_reclassifier, "_classify_unique", classify)
+    assert reclassify_stale_entries(temp_db, workers=1) == 1
+    assert read_rows(temp_db)[0][1] == "greeting"
+
+def test_migrates_unversioned_database(tmp_path):
+    """Test that databases from before versioning gain the new columns."""
+    db_path = tmp_path / "old.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute('''
+            CREATE TABLE entries (
+                id INTEGER PRIMARY KEY,
+                entry TEXT NOT NULL,
+                mood TEXT NOT NULL,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute("INSERT INTO entries (entry, mood) VALUES ('Hi there!', 'neutral')")
+    
+    assert reclassify_stale_entries(db_path, workers=1) == 1
+    assert read_rows(db_path)[0][1:3] == ("greeting", MOOD_CLASSIFIER_VERSION)
+
+def test_reclassifies_archived_entries(tmp_path):
+    """Test that stale moods in archive segments are rewritten and current ones skipped."""
+    db = JournalDatabase(tmp_path / "journal.db", archive_dir=tmp_path / "archive")
+    with sqlite3.connect(db.db_path) as conn:
+        conn.executemany('INSERT INTO entries (entry, mood, timestamp) VALUES (?, ?, ?)', [
+            ("I'm so angry about what happened at work today!", "joy", "2020-01-01 10:00:00"),
+            ("Hi there!", "neutral", "2020-01-02 10:00:00")
+        ])
+    db.archive_entries(older_than_days=30)
+    old_file = db.archive.load_manifest()["segments"][0]["file"]
+    
+    assert reclassify_stale_entries(db.db_path, workers=1, archive_dir=db.archive.archive_dir) == 2
+    segment = db.archive.load_manifest()["segments"][0]
+    assert segment["file"] != old_file
+    assert not (db.archive.archive_dir / old_file).exists()
+    assert segment["moods"] == {"anger": 1, "greeting": 1}
+    assert segment["mood_versions"] == [MOOD_CLASSIFIER_VERSION]
+    assert [entry[0] for entry in db.get_entries_by_mood("anger")] == [
+        "I'm so angry about what happened at work today!"
+    ]
+    
+    # Up-to-date segments are skipped on the next run
+    assert reclassify_stale_entries(db.db_path, workers=1, archive_dir=db.archive.archive_dir) == 0
+    assert db.archive.load_manifest()["segments"][0]["file"] == segment["file"]
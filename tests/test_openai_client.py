@@ -0,0 +1,116 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from src.api import openai_client
+from src.api.openai_client import create_openai_client, generate_reflection, get_client, initialize_openai
+
+def _completion(content):
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-4o-mini",
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": {"prompt_tokens": 5, "completion_tokens": 5, "total_tokens": 10}
+    }
+
+@pytest.fixture
+def stand_in_server():
+    """Local stand-in for the OpenAI API that records client connections."""
+    connections = []
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            connections.append(self.client_address)
+
+        def do_POST(self):
+            length = int(self.headers["Content-Length"])
+            requests.append((self.path, json.loads(self.rfile.read(length))))
+            body = json.dumps(_completion(" Stand-in reflection ")).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.connections = connections
+    server.requests = requests
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture(autouse=True)
+def reset_client(monkeypatch):
+    """Leave no shared client, router or cache behind for other tests."""
+    for name in ("_client", "_async_client", "_owns_client", "_router", "_cache", "_api_key", "_client_options"):
+        monkeypatch.setattr(openai_client, name, getattr(openai_client, name))
+
+def test_reflections_reuse_pooled_connection(stand_in_server):
+    """Test that consecutive reflections share one keep-alive connection."""
+    initialize_openai("test-key", client_options={"base_url": stand_in_server.base_url})
+    for _ in range(3):
+        assert generate_reflection("I had a calm day", "neutral") == "Stand-in reflection"
+
+    assert len(stand_in_server.requests) == 3
+    assert stand_in_server.requests[0][0] == "/v1/chat/completions"
+    assert len(stand_in_server.connections) == 1
+
+def test_injected_client_is_used():
+    """Test that generate_reflection goes through a client injected at initialization."""
+    calls = []
+
+    class StubCompletions:
+        def create(self, **kwargs):
+            calls.append(kwargs)
+            return type("Response", (), {
+                "usage": None,
+                "choices": [type("Choice", (), {"message": type("Message", (), {"content": "stub"})()})()]
+            })()
+
+    stub = type("StubClient", (), {"chat": type("Chat", (), {"completions": StubCompletions()})()})()
+    initialize_openai("test-key", client=stub)
+
+    assert get_client() is stub
+    assert generate_reflection("Quick note", "joy") == "stub"
+    assert calls[0]["model"] == "gpt-4o-mini"
+
+def test_injected_client_is_not_closed():
+    """Test that re-initializing leaves a caller-owned client open."""
+    closed = []
+    stub = type("StubClient", (), {"close": lambda self: closed.append(True)})()
+    initialize_openai("test-key", client=stub)
+    initialize_openai("test-key", client=stub)
+    assert closed == []
+
+def test_create_client_applies_settings():
+    """Test that pool and timeout settings reach the client."""
+    client = create_openai_client("test-key", base_url="http://127.0.0.1:9/v1", timeout=12.0,
+                                  connect_timeout=2.0, max_connections=7, max_retries=0)
+    assert str(client.base_url).startswith("http://127.0.0.1:9/v1")
+    assert client.timeout.read == 12.0
+    assert client.timeout.connect == 2.0
+    assert client.max_retries == 0
+    client.close()
+
+def test_http2_falls_back_without_h2(monkeypatch):
+    """Test that requesting HTTP/2 without the h2 package still builds a client."""
+    monkeypatch.setattr(openai_client, "_http2_available", lambda: False)
+    client = create_openai_client("test-key", http2=True)
+    assert client is not None
+    client.close()
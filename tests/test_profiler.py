@@ -0,0 +1,61 @@
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.concurrency import submit_in_context
+from src.utils.profiler import ChatProfiler
+
+def busy_regex_work(seconds):
+    """Spin on regex matching for the given time."""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        re.search(r'(watch|see)\s+(a\s+)?videos?', "I want to see a video about the sea")
+
+def test_disabled_profiler_does_not_sample(tmp_path):
+    """Test that a zero sample rate never profiles a turn."""
+    profiler = ChatProfiler(sample_rate=0.0, output_dir=tmp_path)
+    with profiler.profile() as profiled:
+        busy_regex_work(0.05)
+    assert not profiled
+    assert profiler.get_stacks() == {}
+    assert profiler.dump() is None
+
+def test_profiled_turns_are_aggregated_and_dumped(tmp_path):
+    """Test that sampled stacks are collapsed, summarized and written to disk."""
+    profiler = ChatProfiler(sample_rate=1.0, interval=0.001, output_dir=tmp_path, dump_every=2, top_n=1000)
+    for _ in range(2):
+        with profiler.profile() as profiled:
+            busy_regex_work(0.1)
+        assert profiled
+    
+    stacks = profiler.get_stacks()
+    assert any("busy_regex_work" in stack for stack in stacks)
+    assert "regex" in profiler.category_breakdown()
+    assert any("busy_regex_work" in name for name, _, _ in profiler.hot_functions())
+    
+    # dump_every=2 wrote a profile after the second turn
+    collapsed = list(tmp_path.glob("*.collapsed"))
+    assert len(collapsed) == 1
+    first_line = collapsed[0].read_text().splitlines()[0]
+    assert re.match(r'^.+ \d+$', first_line)
+    assert list(tmp_path.glob("*.top.txt"))
+
+def test_turn_work_on_pool_threads_is_sampled(tmp_path):
+    """Test that work a profiled turn hands to an executor shows up in the profile."""
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reflection")
+    profiler = ChatProfiler(sample_rate=1.0, interval=0.001, output_dir=tmp_path)
+    with profiler.profile():
+        submit_in_context(executor, busy_regex_work, 0.1).result()
+    executor.shutdown()
+    
+    assert any("busy_regex_work" in stack and "_run_sampled" in stack for stack in profiler.get_stacks())
+    assert "regex" in profiler.category_breakdown()
+
+def test_pool_threads_outside_profiled_turns_are_ignored(tmp_path):
+    """Test that pool work from an unprofiled turn isn't sampled."""
+    executor = ThreadPoolExecutor(max_workers=1)
+    profiler = ChatProfiler(sample_rate=1.0, interval=0.001, output_dir=tmp_path)
+    with profiler.profile():
+        pass
+    submit_in_context(executor, busy_regex_work, 0.05).result()
+    executor.shutdown()
+    assert not any("busy_regex_work" in stack for stack in profiler.get_stacks())
@@ -0,0 +1,76 @@
+import time
+from src.api.reflection_budget import BudgetedReflector
+from src.utils.fallback_reflections import FALLBACK_TEMPLATES, generate_local_reflection
+
+def test_fast_model_reply_is_used():
+    """Test that a reply within the budget is returned as-is."""
+    reflector = BudgetedReflector(lambda entry, mood: "model reply", budget=1.0)
+    text, pending = reflector.reflect("I had a nice day", "joy")
+    assert text == "model reply"
+    assert pending is None
+
+def test_slow_model_falls_back_locally():
+    """Test that a slow model is replaced by a local reflection within the budget."""
+    def slow_generate(entry, mood):
+        time.sleep(0.5)
+        return "late reply"
+    
+    reflector = BudgetedReflector(slow_generate, budget=0.05)
+    start = time.perf_counter()
+    text, pending = reflector.reflect("I'm so stressed", "stress")
+    assert time.perf_counter() - start < 0.4
+    assert text in FALLBACK_TEMPLATES["stress"]
+    
+    # The model's reply is still available once it arrives
+    assert pending.result(timeout=2) == "late reply"
+
+def test_model_error_falls_back_locally():
+    """Test that model errors produce a local reflection instead of an error."""
+    def failing_generate(entry, mood):
+        raise RuntimeError("API down")
+    
+    reflector = BudgetedReflector(failing_generate, budget=1.0)
+    text, pending = reflector.reflect("I feel sad", "sadness")
+    assert text in FALLBACK_TEMPLATES["sadness"]
+    assert pending is None
+
+def test_unknown_mood_uses_neutral_templates():
+    """Test that unknown moods fall back to the neutral templates."""
+    assert generate_local_reflection("Something", "unknown") in FALLBACK_TEMPLATES["neutral"]
+
+def test_reflection_shares_turn_deadline():
+    """Test that a model call started early is bounded by the turn's deadline."""
+    def slow_generate(entry, mood):
+        time.sleep(0.3)
+        return "model reply"
+    
+    reflector = BudgetedReflector(slow_generate, budget=5.0)
+    start = time.monotonic()
+    future = reflector.submit("I'm so stressed", "stress")
+    
+    # Other work for the turn runs while the model call is in flight
+    time.sleep(0.2)
+    text, pending = reflector.reflect("I'm so stressed", "stress", future, deadline=start + 0.25)
+    assert time.monotonic() - start < 0.3
+    assert text in FALLBACK_TEMPLATES["stress"]
+    assert pending is future
+    assert pending.result(timeout=2) == "model reply"
+
+def test_queued_reflection_is_cancelled_at_deadline():
+    """Test that a model call that never started by the deadline is dropped."""
+    calls = []
+    
+    def slow_generate(entry, mood):
+        calls.append(entry)
+        time.sleep(0.3)
+        return "model reply"
+    
+    reflector = BudgetedReflector(slow_generate, budget=0.05, max_workers=1)
+    busy = reflector.submit("first", "neutral")
+    text, pending = reflector.reflect("second", "stress")
+    assert text in FALLBACK_TEMPLATES["stress"]
+    assert pending is None
+    
+    busy.result(timeout=2)
+    time.sleep(0.05)
+    assert calls == ["first"]
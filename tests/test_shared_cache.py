@@ -0,0 +1,97 @@
+import asyncio
+import time
+from src.data.shared_cache import SharedCache
+from src.serving.balancer import StickyBalancer, forwarded_client
+
+def test_cache_roundtrip_and_expiry(tmp_path):
+    """Test that values are shared between instances and expire."""
+    writer = SharedCache(tmp_path / "cache.db")
+    reader = SharedCache(tmp_path / "cache.db")
+    
+    writer.set("youtube", "calm", {"success": True, "results": []}, ttl=60)
+    writer.set("reflection", "short", "Take a breath.", ttl=0.05)
+    assert reader.get("youtube", "calm") == {"success": True, "results": []}
+    assert reader.get("reflection", "short") == "Take a breath."
+    assert reader.get("reflection", "missing") is None
+    
+    time.sleep(0.1)
+    assert reader.get("reflection", "short") is None
+    assert reader.prune() == 1
+
+def test_expired_entries_are_pruned_while_running(tmp_path):
+    """Test that set sweeps expired entries once the prune interval passes."""
+    cache = SharedCache(tmp_path / "cache.db", prune_interval=0.05)
+    cache.set("reflection", "old", "Take a breath.", ttl=0.01)
+    time.sleep(0.1)
+    cache.set("reflection", "new", "Breathe out.", ttl=60)
+    
+    count = cache._connect().execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+    assert count == 1
+
+def test_quota_is_shared(tmp_path):
+    """Test that quota usage is counted across instances and windows reset."""
+    first = SharedCache(tmp_path / "cache.db")
+    second = SharedCache(tmp_path / "cache.db")
+    
+    assert first.consume_quota("youtube", 60, limit=100, window_seconds=60)
+    assert not second.consume_quota("youtube", 60, limit=100, window_seconds=60)
+    assert second.consume_quota("youtube", 40, limit=100, window_seconds=60)
+    
+    assert first.consume_quota("short", 100, limit=100, window_seconds=0.05)
+    time.sleep(0.1)
+    assert second.consume_quota("short", 100, limit=100, window_seconds=0.05)
+
+async def _balancer_replies(requests):
+    """Send each raw request through a balancer over two named backends."""
+    async def make_backend(name):
+        async def handle(reader, writer):
+            data = await reader.read(200)
+            writer.write(name + b":" + data)
+            await writer.drain()
+            writer.close()
+        return await asyncio.start_server(handle, "127.0.0.1", 0)
+    
+    backends = [await make_backend(b"a"), await make_backend(b"b")]
+    addresses = [server.sockets[0].getsockname()[:2] for server in backends]
+    balancer = StickyBalancer(addresses)
+    front = await asyncio.start_server(balancer.handle_client, "127.0.0.1", 0)
+    port = front.sockets[0].getsockname()[1]
+    
+    replies = []
+    for request in requests:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(request)
+        await writer.drain()
+        replies.append(await reader.read(200))
+        writer.close()
+    
+    for server in backends + [front]:
+        server.close()
+    return replies, balancer
+
+def test_balancer_proxies_to_sticky_backend():
+    """Test that a client is proxied and always lands on the same backend."""
+    request = b"GET / HTTP/1.1\r\nHost: localhost\r\n\r\n"
+    replies, balancer = asyncio.run(_balancer_replies([request] * 3))
+    assert len(set(replies)) == 1
+    assert replies[0].endswith(b":" + request)
+    assert len(balancer.backend_order("127.0.0.1")) == 2
+
+def test_balancer_pins_on_forwarded_client():
+    """Test that clients behind one proxy are spread by X-Forwarded-For."""
+    clients = [f"203.0.113.{i}" for i in range(8)]
+    requests = [
+        f"GET / HTTP/1.1\r\nHost: localhost\r\nX-Forwarded-For: {client}, 10.0.0.1\r\n\r\n".encode()
+        for client in clients
+    ]
+    replies, balancer = asyncio.run(_balancer_replies(requests))
+    backend_names = {address: name for address, name in zip(balancer.backends, (b"a", b"b"))}
+    assert [reply[:1] for reply in replies] == [backend_names[balancer.backend_order(c)[0]] for c in clients]
+    assert len({reply[:1] for reply in replies}) == 2
+
+def test_forwarded_client_parsing():
+    """Test that the first X-Forwarded-For hop is used and absence gives None."""
+    head = b"GET / HTTP/1.1\r\nx-forwarded-for:  198.51.100.7 , 10.0.0.2\r\n\r\n"
+    assert forwarded_client(head) == "198.51.100.7"
+    assert forwarded_client(b"GET / HTTP/1.1\r\nHost: localhost\r\n\r\n") is None
+    assert forwarded_client(b"") is None
@@ -0,0 +1,184 @@
+import threading
+import time
+import pytest
+from src.api.youtube_client import YouTubeToolHandler
+from src.data.shared_cache import SharedCache
+from src.utils.text_processing import format_tool_responses
+
+@pytest.fixture
+def handler():
+    """Create a tool handler with fake tools registered."""
+    handler = YouTubeToolHandler("test-key", default_timeout=1.0)
+    
+    def slow_tool(delay, title):
+        time.sleep(delay)
+        return {"success": True, "results": [{"title": title, "url": f"https://example.com/{title}"}]}
+    
+    handler.register_tool("slow_tool", slow_tool)
+    handler.register_tool("stuck_tool", lambda: time.sleep(1) or {"success": True, "results": []}, timeout=0.05)
+    return handler
+
+def test_tools_run_concurrently(handler):
+    """Test that several invocations run in parallel and keep their order."""
+    invocations = [
+        {"tool": "slow_tool", "delay": 0.2, "title": "first"},
+        {"tool": "slow_tool", "delay": 0.2, "title": "second"},
+        {"tool": "slow_tool", "delay": 0.2, "title": "third"}
+    ]
+    start = time.perf_counter()
+    results = handler.handle_tool_calls(invocations)
+    assert time.perf_counter() - start < 0.5
+    assert [result["results"][0]["title"] for _, result in results] == ["first", "second", "third"]
+
+def test_tool_timeout_and_unknown_tool(handler):
+    """Test that slow and unknown tools report errors without blocking others."""
+    results = handler.handle_tool_calls([
+        {"tool": "stuck_tool"},
+        {"tool": "missing_tool"},
+        {"tool": "slow_tool", "delay": 0, "title": "ok"}
+    ])
+    assert results[0] == ("stuck_tool", {"success": False, "error": "stuck_tool timed out"})
+    assert "Unknown tool" in results[1][1]["error"]
+    assert results[2][1]["success"]
+
+def test_format_tool_responses_merges_results():
+    """Test that responses from several tools are merged into one message."""
+    video = {"success": True, "results": [{"title": "Calm", "url": "https://example.com/calm"}]}
+    merged = format_tool_responses([
+        ("search_video", video),
+        ("get_mood_based_recommendation", video)
+    ])
+    assert "I found a video that might interest you: 'Calm'" in merged
+    assert "Based on your mood, you might enjoy this video: 'Calm'" in merged
+
+class FakeVideosResource:
+    """Stand-in for the videos() resource that records batched lookups."""
+    
+    def __init__(self):
+        self.calls = []
+    
+    def list(self, **kwargs):
+        self.calls.append(kwargs)
+        return self
+    
+    def execute(self):
+        ids = self.calls[-1]["id"].split(",")
+        return {"items": [
+            {
+                "id": video_id,
+                "contentDetails": {"duration": "PT4M13S"},
+                "statistics": {"viewCount": "42"},
+                "snippet": {"thumbnails": {"medium": {"url": f"https://img.example.com/{video_id}.jpg"}}}
+            }
+            for video_id in ids
+        ]}
+
+class FakeYouTubeClient:
+    def __init__(self):
+        self.videos_resource = FakeVideosResource()
+    
+    def videos(self):
+        return self.videos_resource
+
+def test_enrichment_uses_one_batched_request(handler, monkeypatch):
+    """Test that all videos found in a turn are enriched with one request."""
+    fake_client = FakeYouTubeClient()
+    monkeypatch.setattr(YouTubeToolHandler, "youtube_client", property(lambda self: fake_client))
+    
+    def found_videos(ids):
+        return {"success": True, "results": [
+            {"video_id": video_id, "title": video_id, "url": f"https://www.youtube.com/watch?v={video_id}"}
+            for video_id in ids
+        ]}
+    
+    handler.register_tool("found_videos", found_videos)
+    results = handler.handle_tool_calls([
+        {"tool": "found_videos", "ids": ["a", "b"]},
+        {"tool": "found_videos", "ids": ["b", "c"]}
+    ])
+    
+    assert len(fake_client.videos_resource.calls) == 1
+    assert fake_client.videos_resource.calls[0]["id"] == "a,b,c"
+    video = results[0][1]["results"][0]
+    assert video["duration"] == "4:13"
+    assert video["view_count"] == 42
+    assert video["thumbnail"] == "https://img.example.com/a.jpg"
+    
+    formatted = format_tool_responses([("search_video", results[0][1])])
+    assert "'a' (4:13)" in formatted
+
+def test_turn_deadline_caps_tool_timeouts(handler):
+    """Test that no tool waits past the turn's deadline."""
+    start = time.monotonic()
+    results = handler.handle_tool_calls(
+        [{"tool": "slow_tool", "delay": 0.5, "title": "late"}],
+        deadline=start + 0.1
+    )
+    assert time.monotonic() - start < 0.3
+    assert results[0] == ("slow_tool", {"success": False, "error": "slow_tool timed out"})
+
+def test_timed_out_queued_tools_are_cancelled():
+    """Test that a tool still queued at its timeout never runs."""
+    handler = YouTubeToolHandler("test-key", max_workers=1, default_timeout=1.0)
+    ran = []
+    handler.register_tool("blocker", lambda: time.sleep(0.3) or {"success": True, "results": []}, timeout=0.05)
+    handler.register_tool("queued", lambda: ran.append(True) or {"success": True, "results": []}, timeout=0.05)
+    
+    results = handler.handle_tool_calls([{"tool": "blocker"}, {"tool": "queued"}], enrich=False)
+    assert not results[1][1]["success"]
+    time.sleep(0.4)
+    assert ran == []
+
+def test_zero_timeout_is_respected(handler):
+    """Test that a zero per-tool timeout isn't replaced by the default."""
+    handler.register_tool("instant", lambda: {"success": True, "results": []}, timeout=0)
+    assert handler.tool_timeouts["instant"] == 0
+
+def test_slow_enrichment_is_bounded(monkeypatch):
+    """Test that enrichment runs on the tool pool and gives up at its timeout."""
+    handler = YouTubeToolHandler("test-key", enrich_timeout=0.05)
+    threads = []
+    
+    def slow_details(video_ids):
+        threads.append(threading.current_thread().name)
+        time.sleep(0.5)
+        return {"a": {"duration": "1:00"}}
+    
+    monkeypatch.setattr(handler, "_fetch_video_details", slow_details)
+    handler.register_tool("found", lambda: {"success": True, "results": [{"video_id": "a", "title": "a", "url": "u"}]})
+    
+    start = time.monotonic()
+    results = handler.handle_tool_calls([{"tool": "found"}])
+    assert time.monotonic() - start < 0.3
+    assert threads[0].startswith("youtube-tool")
+    
+    # A lookup finishing late doesn't touch the results already returned
+    time.sleep(0.6)
+    assert "duration" not in results[0][1]["results"][0]
+
+def test_cached_results_are_stored_enriched(tmp_path, monkeypatch):
+    """Test that cache hits come back enriched without another API call."""
+    fake_client = FakeYouTubeClient()
+    monkeypatch.setattr(YouTubeToolHandler, "youtube_client", property(lambda self: fake_client))
+    handler = YouTubeToolHandler("test-key", cache=SharedCache(tmp_path / "cache.db"))
+    calls = []
+    
+    def found():
+        calls.append(True)
+        return {"success": True, "results": [{"video_id": "a", "title": "a", "url": "u"}]}
+    
+    handler.register_tool("found", found)
+    handler.handle_tool_calls([{"tool": "found"}])
+    results = handler.handle_tool_calls([{"tool": "found"}])
+    
+    assert len(calls) == 1
+    assert len(fake_client.videos_resource.calls) == 1
+    assert results[0][1]["results"][0]["duration"] == "4:13"
+
+def test_zero_cache_ttl_disables_caching(tmp_path):
+    """Test that a cache TTL of 0 stores nothing."""
+    cache = SharedCache(tmp_path / "cache.db")
+    handler = YouTubeToolHandler("test-key", cache=cache, cache_ttl=0)
+    handler.register_tool("found", lambda: {"success": True, "results": []})
+    handler.handle_tool_calls([{"tool": "found"}])
+    assert cache._connect().execute('SELECT COUNT(*) FROM cache').fetchone()[0] == 0